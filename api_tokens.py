@@ -0,0 +1,38 @@
+import argparse
+from app import app, db
+from app.models import ApiToken, User
+from app.tokens import issue_token, revoke_token
+
+# Manage bearer tokens for the /api/v1 read API
+parser = argparse.ArgumentParser(description='TaskMaster API token management')
+commands = parser.add_subparsers(dest='command', required=True)
+create = commands.add_parser('create', help='issue a token for a user')
+create.add_argument('username')
+create.add_argument('--name', default='api', help='label to tell tokens apart')
+listing = commands.add_parser('list', help='list the tokens of a user')
+listing.add_argument('username')
+revoke = commands.add_parser('revoke', help='revoke a token by id')
+revoke.add_argument('id', type=int)
+args = parser.parse_args()
+
+with app.app_context():
+    if args.command == 'revoke':
+        record = db.session.get(ApiToken, args.id)
+        if record is None:
+            parser.error(f'no token with id {args.id}')
+        revoke_token(db.session, record)
+        db.session.commit()
+        print(f'Revoked token {record.id} ({record.name}) of {record.user.username}')
+    else:
+        user = User.query.filter_by(username=args.username).first()
+        if user is None:
+            parser.error(f"no user named '{args.username}'")
+        if args.command == 'create':
+            token, record = issue_token(db.session, user, args.name)
+            db.session.commit()
+            print(f'Token {record.id} ({record.name}) for {user.username}; it is not stored and cannot be shown again:')
+            print(token)
+        else:
+            for record in ApiToken.query.filter_by(user_id=user.id).order_by(ApiToken.id):
+                state = f"revoked {record.revoked_on:%Y-%m-%d %H:%M}" if record.revoked_on else 'active'
+                print(f'{record.id:>5}  {record.name:<20} created {record.created_on:%Y-%m-%d %H:%M}  {state}')
@@ -1,36 +1,53 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-import os
 from dotenv import load_dotenv
 
-# Load environment variables
+# Load environment variables before the config profiles read them
 load_dotenv()
 
+from app import config, replicas, cache, assets, metrics, compression, jobs, history, ratelimit, sqlite, schema, reminders, profiling, tokens, saved_views
+
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': replicas.RoutingSession})
 login_manager = LoginManager()
 
-# Create and configure the app
+# Create and configure the app from the profile named by TASKMASTER_PROFILE
 app = Flask(__name__)
-
-# Configure the app
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'default-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config.from_object(config.load_profile())
+app.config['SQLALCHEMY_BINDS'] = replicas.replica_binds(app.config['SQLALCHEMY_REPLICA_URLS'])
 
 # Initialize extensions with the app
 db.init_app(app)
 login_manager.init_app(app)
-login_manager.login_view = 'login'
+login_manager.login_view = 'auth.login'
+tokens.init_app(app, db, login_manager)
+replicas.init_app(app, db)
+sqlite.init_app(app, db)
+assets.init_app(app)
+metrics.init_app(app)
+compression.init_app(app)
+ratelimit.init_app(app, db)
+profiling.init_app(app)
 
 # Get the app context
 with app.app_context():
     # Import models to ensure they're registered with SQLAlchemy
-    from app.models import User, Task
+    from app.models import User, Task, ArchivedTask, TaskEvent, ApiToken, SavedView, SavedViewTask, CacheGeneration, JobLease
     
     # Create database tables if they don't exist
     db.create_all()
+    sqlite.check_task_ids(app, db)
+    schema.check_columns(app, db)
+    cache.init_app(app, db)
+    history.init_app(app, db)
+    reminders.init_app(app, db)
+    saved_views.init_app(app, db)
+
+jobs.init_app(app)
 
 # Import routes at the bottom to avoid circular imports
-from app import routes
\ No newline at end of file
+from app import routes
+app.register_blueprint(routes.auth)
+app.register_blueprint(routes.main)
+app.register_blueprint(routes.api)
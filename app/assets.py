@@ -0,0 +1,136 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+# build_assets.py loads this file by path, so it must not import the app package
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always built
+    brotli = None
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+
+# Fingerprinted files never change, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def minify_css(text):
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    text = re.sub(r'([{;])([\w-]+)\s*:\s*', r'\1\2:', text)
+    return text.replace(';}', '}').strip()
+
+
+def minify_js(text):
+    # Deliberately conservative: only whole-line comments, indentation and
+    # blank lines are removed, so string and template literals stay intact.
+    lines = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//'):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def build_assets(static_folder):
+    """Write minified, content hashed and precompressed copies of the static files.
+
+    Output goes to ``<static_folder>/dist`` together with a manifest mapping
+    each original filename to its fingerprinted name.
+    """
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder) and DIST_DIR in dirs:
+            dirs.remove(DIST_DIR)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            filename = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            stem, ext = os.path.splitext(filename)
+
+            with open(source, 'rb') as f:
+                content = f.read()
+            if ext in MINIFIERS:
+                content = MINIFIERS[ext](content.decode('utf-8')).encode('utf-8')
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            hashed = f'{stem}.{digest}{ext}'
+            target = os.path.join(dist_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+
+            if ext in COMPRESSIBLE_EXTENSIONS:
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(content, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(brotli.compress(content, quality=11))
+
+            manifest[filename] = f'{DIST_DIR}/{hashed}'
+
+    with open(os.path.join(dist_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    if not os.path.isfile(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def init_app(app):
+    """Serve fingerprinted assets when a build exists.
+
+    ``url_for('static', filename='css/style.css')`` keeps working in the
+    templates and resolves to the fingerprinted file from the manifest.
+    Without a build the default static handler is left untouched.
+    """
+    manifest = load_manifest(app.static_folder)
+    app.extensions['asset_manifest'] = manifest
+    if not manifest:
+        return
+
+    @app.url_defaults
+    def _fingerprint_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    def static(filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(filename)[0]
+        response = None
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[encoding] and os.path.isfile(os.path.join(app.static_folder, filename + suffix)):
+                response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+                response.headers['Content-Encoding'] = encoding
+                break
+        if response is None:
+            response = app.send_static_file(filename)
+
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
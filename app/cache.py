@@ -0,0 +1,162 @@
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from flask import g, has_request_context
+from sqlalchemy import event, insert, select, update
+
+# Name of the shared generation counter of the task cache
+TASKS = 'tasks'
+
+
+class QueryCache:
+    """Bounded LRU cache for task list results.
+
+    Every entry remembers the generation it was computed in; once a newer
+    generation is seen, all older entries turn into misses. Entries read
+    from a replica also expire after a TTL, since the replica may not have
+    a write yet when its generation moves on.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation = 0
+        # Lifetime of entries read from a replica
+        self.replica_ttl = 5
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            expired = entry is not None and entry[3] is not None and entry[3] <= time.monotonic()
+            if entry is None or entry[0] != self.generation or expired:
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, generation, ttl=None):
+        """Store a value computed from data read in ``generation``, for at
+        most ``ttl`` seconds if given"""
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+        with self._lock:
+            if generation != self.generation or size > self.max_bytes:
+                return
+            self._discard(key)
+            expires = time.monotonic() + ttl if ttl is not None else None
+            self._entries[key] = (generation, value, size, expires)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def advance(self, generation):
+        """Move on to ``generation`` if it is newer than the current one"""
+        with self._lock:
+            if generation > self.generation:
+                self.generation = generation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.generation = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'generation': self.generation,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+
+def id_list(ids):
+    """Pack task ids into a compact array for caching"""
+    return array('q', ids)
+
+
+task_cache = QueryCache()
+
+
+def bump_generation(connection):
+    """Count a task write in the shared generation, inside the writing transaction"""
+    from app.models import CacheGeneration
+
+    table = CacheGeneration.__table__
+    bumped = connection.execute(
+        update(table).where(table.c.name == TASKS).values(value=table.c.value + 1)
+    ).rowcount
+    if not bumped:
+        connection.execute(insert(table).values(name=TASKS, value=1))
+
+
+def current_generation():
+    """The shared generation of the task cache, read from the primary once
+    per request (on every call outside one).
+
+    Other web workers and the job worker write tasks too; reading the
+    counter they bump is what lets this process notice their writes.
+    """
+    from app import db
+    from app.models import CacheGeneration
+
+    if has_request_context() and 'task_generation' in g:
+        return g.task_generation
+    generation = db.session.execute(
+        select(CacheGeneration.value).where(CacheGeneration.name == TASKS),
+        bind_arguments={'bind': db.engine},
+    ).scalar() or 0
+    task_cache.advance(generation)
+    if has_request_context():
+        g.task_generation = generation
+    return generation
+
+
+def init_app(app, db):
+    """Size the task cache from config and invalidate it on task writes"""
+    from app.models import Task
+
+    task_cache.max_entries = app.config.get('QUERY_CACHE_MAX_ENTRIES', task_cache.max_entries)
+    task_cache.max_bytes = app.config.get('QUERY_CACHE_MAX_BYTES', task_cache.max_bytes)
+    # Users who wrote read the primary for REPLICA_STICKY_SECONDS; replicas are
+    # trusted to have caught up after that, so replica entries live as long
+    task_cache.replica_ttl = app.config.get('REPLICA_STICKY_SECONDS', task_cache.replica_ttl)
+
+    # The counter is bumped in the writing transaction, so the new generation
+    # becomes visible together with the write, and a rollback undoes both.
+    # Replicas may still lag behind the commit; entries read from them expire
+    # instead after replica_ttl.
+    @event.listens_for(db.session, 'after_flush')
+    def _note_task_writes(session, flush_context):
+        changed = session.new | session.dirty | session.deleted
+        if any(isinstance(obj, Task) for obj in changed):
+            bump_generation(session.connection())
+            session.info['tasks_changed'] = True
+
+    # A request that reads lists after its own write must see the new generation
+    @event.listens_for(db.session, 'after_commit')
+    def _forget_generation(session):
+        if session.info.pop('tasks_changed', False) and has_request_context():
+            g.pop('task_generation', None)
+
+    @event.listens_for(db.session, 'after_rollback')
+    def _forget_task_writes(session):
+        session.info.pop('tasks_changed', None)
@@ -0,0 +1,231 @@
+import time
+import zlib
+
+from app.metrics import metrics, ENDPOINT_ENVIRON_KEY
+
+try:
+    import brotli
+except ImportError:  # brotli is optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstandard is optional
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+class _Gzip:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+class _Brotli:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+    def finish(self):
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._obj.flush()
+
+
+def available_encodings():
+    """Supported encodings in server preference order"""
+    encodings = []
+    if brotli is not None:
+        encodings.append(('br', _Brotli))
+    if zstandard is not None:
+        encodings.append(('zstd', _Zstd))
+    encodings.append(('gzip', _Gzip))
+    return encodings
+
+
+def negotiate(accept_encoding, encodings):
+    """Pick the encoding with the highest q-value, preferring earlier ones on ties"""
+    weights = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best = None
+    for name, factory in encodings:
+        q = weights.get(name, weights.get('*', 0.0))
+        if q > 0 and (best is None or q > best[0]):
+            best = (q, name, factory)
+    return best[1:] if best else None
+
+
+class CompressionMiddleware:
+    """WSGI middleware compressing response bodies according to Accept-Encoding.
+
+    Bodies smaller than ``min_size``, already encoded responses and content
+    types that do not compress well are passed through untouched. Responses
+    without a Content-Length (streamed responses) are compressed chunk by
+    chunk. Compression ratio and CPU time are recorded per route.
+    """
+
+    def __init__(self, app, min_size=500, level=6):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.encodings = available_encodings()
+
+    def __call__(self, environ, start_response):
+        chosen = negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        if chosen is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captured = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return lambda data: None  # the write() callable is never used by Flask
+
+        app_iter = self.app(environ, capture)
+        status, headers, exc_info = captured
+        header_map = {name.lower(): value for name, value in headers}
+
+        if not self._should_compress(status, header_map):
+            start_response(status, headers, exc_info)
+            return app_iter
+
+        length = header_map.get('content-length')
+        if length is not None and int(length) < self.min_size:
+            start_response(status, headers, exc_info)
+            return app_iter
+
+        encoding, factory = chosen
+        route = environ.get(ENDPOINT_ENVIRON_KEY)
+        headers = [(name, value) for name, value in headers
+                   if name.lower() not in ('content-length', 'etag', 'vary')]
+        headers.append(('Content-Encoding', encoding))
+        headers.append(('Vary', _vary(header_map.get('vary'))))
+        if 'etag' in header_map:
+            headers.append(('ETag', _weak_etag(header_map['etag'])))
+
+        if length is None:
+            start_response(status, headers, exc_info)
+            return self._stream(app_iter, factory(self.level), route)
+
+        try:
+            body = b''.join(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+        started = time.thread_time()
+        compressor = factory(self.level)
+        compressed = compressor.compress(body) + compressor.finish()
+        self._record(route, len(body), len(compressed), time.thread_time() - started)
+
+        headers.append(('Content-Length', str(len(compressed))))
+        start_response(status, headers, exc_info)
+        return [compressed]
+
+    def _should_compress(self, status, header_map):
+        if status[:3] in ('204', '206', '304'):
+            return False
+        if 'content-encoding' in header_map:
+            return False
+        if 'no-transform' in header_map.get('cache-control', ''):
+            return False
+        content_type = header_map.get('content-type', '')
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _stream(self, app_iter, compressor, route):
+        size_in = size_out = 0
+        cpu = 0.0
+        try:
+            for chunk in app_iter:
+                if not chunk:
+                    continue
+                started = time.thread_time()
+                # Flush every chunk so streamed exports reach the client promptly
+                data = compressor.compress(chunk) + compressor.flush()
+                cpu += time.thread_time() - started
+                size_in += len(chunk)
+                size_out += len(data)
+                if data:
+                    yield data
+            started = time.thread_time()
+            data = compressor.finish()
+            cpu += time.thread_time() - started
+            size_out += len(data)
+            if data:
+                yield data
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+            self._record(route, size_in, size_out, cpu)
+
+    def _record(self, route, size_in, size_out, cpu):
+        metrics.add(route,
+                    compressed_responses=1,
+                    compression_bytes_in=size_in,
+                    compression_bytes_out=size_out,
+                    compression_cpu_seconds=cpu)
+
+
+def _vary(existing):
+    if not existing:
+        return 'Accept-Encoding'
+    if 'accept-encoding' in existing.lower():
+        return existing
+    return f'{existing}, Accept-Encoding'
+
+
+def _weak_etag(etag):
+    # The compressed body differs byte for byte from the original
+    return etag if etag.startswith('W/') else f'W/{etag}'
+
+
+def init_app(app):
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config.get('COMPRESSION_MIN_SIZE', 500),
+        level=app.config.get('COMPRESSION_LEVEL', 6),
+    )
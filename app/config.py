@@ -0,0 +1,151 @@
+import os
+
+
+def _env_bool(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+
+def _env_list(name):
+    return [item.strip() for item in os.environ.get(name, '').split(',') if item.strip()]
+
+
+def _env_dict(name):
+    return dict(item.split('=', 1) for item in _env_list(name) if '=' in item)
+
+
+class Config:
+    """Settings shared by every profile; each one can be overridden from the environment"""
+    # The fallback key is public, so only profiles for local use may keep it
+    SECRET_KEY = os.environ.get('SECRET_KEY', 'default-secret-key')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///taskmaster.db')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Read replicas: comma separated database URLs used by read-only views
+    SQLALCHEMY_REPLICA_URLS = _env_list('DATABASE_REPLICA_URLS')
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+    # Task list paging and the cache of list results
+    TASKS_PER_PAGE = int(os.environ.get('TASKS_PER_PAGE', 48))
+    TASKS_VIRTUAL_LIST = _env_bool('TASKS_VIRTUAL_LIST')
+    QUERY_CACHE_MAX_ENTRIES = int(os.environ.get('QUERY_CACHE_MAX_ENTRIES', 256))
+    QUERY_CACHE_MAX_BYTES = int(os.environ.get('QUERY_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+
+    # Response compression
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+    COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+
+    # Background maintenance jobs (run them in-process, or with python worker.py).
+    # With several web workers every one runs the scheduler; jobs that must run
+    # once, such as sending reminders, take a lease row in job_lease first.
+    JOBS_ENABLED = _env_bool('JOBS_ENABLED')
+    ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+
+    # Task history: events kept per task before compaction, and how long the
+    # history of deleted tasks is retained
+    HISTORY_MAX_EVENTS = int(os.environ.get('HISTORY_MAX_EVENTS', 50))
+    HISTORY_RETENTION_DAYS = int(os.environ.get('HISTORY_RETENTION_DAYS', 90))
+
+    # Reminders: minutes before a task becomes overdue at which to notify
+    # (0 is the overdue notice itself), sent through REMINDER_SINK, either
+    # 'log' or 'webhook' (POSTs JSON to REMINDER_WEBHOOK_URL)
+    REMINDER_OFFSETS_MINUTES = [int(minutes) for minutes in _env_list('REMINDER_OFFSETS_MINUTES')] or [1440, 60, 0]
+    REMINDER_HORIZON_HOURS = int(os.environ.get('REMINDER_HORIZON_HOURS', 48))
+    REMINDER_TICK_SECONDS = int(os.environ.get('REMINDER_TICK_SECONDS', 60))
+    REMINDER_SINK = os.environ.get('REMINDER_SINK', 'log')
+    REMINDER_WEBHOOK_URL = os.environ.get('REMINDER_WEBHOOK_URL', '')
+
+    # Rate limiting: per-user token buckets written as 'count/period'.
+    # RATELIMIT_ROUTES overrides the default per endpoint ('endpoint=30/minute,...');
+    # the 'search' budget covers task searches from any view. Buckets live in
+    # memory unless RATELIMIT_STORAGE_URL points to a shared redis.
+    RATELIMIT_ENABLED = _env_bool('RATELIMIT_ENABLED', True)
+    RATELIMIT_STORAGE_URL = os.environ.get('RATELIMIT_STORAGE_URL', '')
+    RATELIMIT_DEFAULT = os.environ.get('RATELIMIT_DEFAULT', '300/minute')
+    RATELIMIT_ROUTES = {
+        'auth.login': '10/minute',
+        'main.update_task_status': '60/minute',
+        'search': '30/minute',
+        **_env_dict('RATELIMIT_ROUTES'),
+    }
+
+    # Admission control: searches and archive listings get a 503 while the
+    # average database statement latency is above this (0 disables)
+    SHED_DB_LATENCY_MS = int(os.environ.get('SHED_DB_LATENCY_MS', 250))
+
+    # SQLite connection tuning, ignored for other databases. Empty or zero
+    # values leave SQLite's own defaults; the 'sqlite' profile turns them on.
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', '')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', '')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 0))
+    SQLITE_IMMEDIATE_WRITES = _env_bool('SQLITE_IMMEDIATE_WRITES')
+    # Refuse to start on tables that lack columns of the models, or on a
+    # SQLite task table that reuses ids (see migrate_task_ids.py); only the
+    # maintenance scripts turn this off
+    SCHEMA_CHECK = _env_bool('SCHEMA_CHECK', True)
+
+    # Sampling profiler: while PROFILING_ENABLED, PROFILING_SAMPLE_RATE percent
+    # of requests are sampled every PROFILING_INTERVAL_MS. A request carrying
+    # 'X-Profile: <ADMIN_TOKEN>' is always profiled; stacks are served from
+    # /admin/profiles to 'Authorization: Bearer <ADMIN_TOKEN>'.
+    PROFILING_ENABLED = _env_bool('PROFILING_ENABLED')
+    PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 1))
+    PROFILING_INTERVAL_MS = float(os.environ.get('PROFILING_INTERVAL_MS', 5))
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+
+    # API tokens are verified against the database at most once per this many
+    # seconds per worker; a revoked token keeps working in other workers for
+    # up to that long
+    API_TOKEN_CACHE_SECONDS = int(os.environ.get('API_TOKEN_CACHE_SECONDS', 60))
+
+    # Settings the profile cannot start without
+    REQUIRED = ()
+
+    @classmethod
+    def check(cls):
+        missing = [name for name in cls.REQUIRED if not os.environ.get(name)]
+        if missing:
+            raise RuntimeError(f"The {cls.__name__} profile needs {', '.join(missing)} set in the environment")
+
+
+class DevelopmentConfig(Config):
+    """Local SQLite database in the instance folder (formerly main.py)"""
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///taskmaster.db'
+
+
+class ProductionConfig(Config):
+    """Database from DATABASE_URL (formerly app.py); no fallbacks for secrets"""
+    REQUIRED = ('SECRET_KEY', 'DATABASE_URL')
+    SECRET_KEY = os.environ.get('SECRET_KEY')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+
+
+class SQLiteConfig(Config):
+    """Several worker processes sharing one SQLite file: WAL journal so reads
+    never wait for writers, and transactions moved to BEGIN IMMEDIATE at
+    their first write and queued per process"""
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///taskmaster.db')
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_IMMEDIATE_WRITES = _env_bool('SQLITE_IMMEDIATE_WRITES', True)
+
+
+profiles = {
+    'default': Config,
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'sqlite': SQLiteConfig,
+}
+
+
+def load_profile(name=None):
+    """Config class for a profile name, by default taken from TASKMASTER_PROFILE"""
+    name = name or os.environ.get('TASKMASTER_PROFILE', 'default')
+    if name not in profiles:
+        raise ValueError(f"Unknown TASKMASTER_PROFILE '{name}', expected one of: {', '.join(profiles)}")
+    profiles[name].check()
+    return profiles[name]
@@ -1,5 +1,5 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, TextAreaField, DateField, SelectField, SubmitField
+from wtforms import StringField, PasswordField, BooleanField, TextAreaField, DateField, SelectField, SubmitField, HiddenField
 from wtforms.validators import DataRequired, Length, EqualTo, ValidationError
 from app.models import User
 
@@ -30,4 +30,16 @@ class TaskForm(FlaskForm):
         ('completed', 'Completed')
     ], validators=[DataRequired()])
     remarks = TextAreaField('Remarks')
-    submit = SubmitField('Save Task')
\ No newline at end of file
+    # Version of the task the form was rendered from, checked on save
+    version = HiddenField()
+    submit = SubmitField('Save Task')
+
+class SavedViewForm(FlaskForm):
+    name = StringField('View name', validators=[DataRequired(), Length(max=64)])
+    # The list filters being saved, named like the query string arguments
+    filter = HiddenField()
+    status = HiddenField()
+    search = HiddenField()
+    sort_by = HiddenField()
+    sort_order = HiddenField()
+    submit = SubmitField('Save View')
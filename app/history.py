@@ -0,0 +1,117 @@
+import json
+from datetime import datetime, timedelta
+
+from flask import has_request_context
+from flask_login import current_user
+from sqlalchemy import event, func, inspect, select
+
+# Task fields whose changes are recorded in the history
+TRACKED_FIELDS = ('title', 'description', 'due_date', 'status', 'remarks')
+
+
+def dumps(changes):
+    return json.dumps(changes, separators=(',', ':'), default=_encode)
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec='seconds')
+    raise TypeError(f'Cannot encode {type(value).__name__}')
+
+
+def _changed_fields(task):
+    state = inspect(task)
+    changes = {}
+    for field in TRACKED_FIELDS:
+        history = state.attrs[field].history
+        if not history.added:
+            continue
+        new = history.added[0]
+        if history.deleted and history.deleted[0] == new:
+            continue
+        changes[field] = new
+    return changes
+
+
+def _deleted_by(task):
+    # A delete leaves no last_updated_by of its own; that column still names
+    # the previous editor, so take the user of the request doing the delete
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+
+def _event_rows(session, Task):
+    now = datetime.utcnow()
+    rows = []
+    for task in session.new:
+        if isinstance(task, Task):
+            rows.append({'task_id': task.id, 'ts': now, 'user_id': task.last_updated_by_id, 'kind': 'create',
+                         'changes': dumps({field: getattr(task, field) for field in TRACKED_FIELDS})})
+    for task in session.dirty:
+        if isinstance(task, Task):
+            changes = _changed_fields(task)
+            if changes:
+                rows.append({'task_id': task.id, 'ts': now, 'user_id': task.last_updated_by_id, 'kind': 'update',
+                             'changes': dumps(changes)})
+    for task in session.deleted:
+        if isinstance(task, Task):
+            rows.append({'task_id': task.id, 'ts': now, 'user_id': _deleted_by(task), 'kind': 'delete',
+                         'changes': None})
+    return rows
+
+
+def task_history(task_id):
+    """Events of one task, oldest first"""
+    from app.models import TaskEvent
+
+    return TaskEvent.query.filter_by(task_id=task_id).order_by(TaskEvent.ts, TaskEvent.id).all()
+
+
+def compact_history(max_events=None, retention_days=None):
+    """Fold the oldest events of long histories into a snapshot and drop the
+    history of tasks deleted more than ``retention_days`` ago."""
+    from app import db
+    from app.jobs import scheduler
+    from app.models import TaskEvent
+
+    config = scheduler.app.config
+    max_events = max_events or config['HISTORY_MAX_EVENTS']
+    retention_days = retention_days if retention_days is not None else config['HISTORY_RETENTION_DAYS']
+
+    compacted = 0
+    long_histories = db.session.scalars(
+        select(TaskEvent.task_id).group_by(TaskEvent.task_id).having(func.count() > max_events)
+    ).all()
+    for task_id in long_histories:
+        events = task_history(task_id)
+        # Leave room for the snapshot so the task ends up with max_events rows
+        folded = events[:len(events) - max_events + 1]
+        state = {}
+        for folded_event in folded:
+            if folded_event.changes:
+                state.update(json.loads(folded_event.changes))
+        last = folded[-1]
+        for folded_event in folded:
+            db.session.delete(folded_event)
+        db.session.add(TaskEvent(task_id=task_id, ts=last.ts, user_id=last.user_id, kind='snapshot', changes=dumps(state)))
+        db.session.commit()
+        compacted += 1
+
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    expired = select(TaskEvent.task_id).where(TaskEvent.kind == 'delete', TaskEvent.ts < cutoff)
+    pruned = TaskEvent.query.filter(TaskEvent.task_id.in_(expired)).delete(synchronize_session=False)
+    db.session.commit()
+    return {'compacted': compacted, 'pruned': pruned}
+
+
+def init_app(app, db):
+    from app.models import Task, TaskEvent
+
+    # Events are written with a single multi-row INSERT inside the flush, so
+    # they commit or roll back together with the task change itself.
+    @event.listens_for(db.session, 'after_flush')
+    def _record_task_events(session, flush_context):
+        rows = _event_rows(session, Task)
+        if rows:
+            session.connection().execute(TaskEvent.__table__.insert(), rows)
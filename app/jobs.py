@@ -0,0 +1,193 @@
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, literal, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.cache import bump_generation
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+class Job:
+    def __init__(self, name, interval, func, in_process=False):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        # Only useful in the web process, e.g. because it warms its caches
+        self.in_process = in_process
+        self.next_run = time.time() + interval
+        self.last_run = None
+        self.last_error = None
+
+
+class Scheduler:
+    """Runs registered maintenance jobs at fixed intervals.
+
+    Jobs run inside an application context, either from a background thread
+    in the web process (JOBS_ENABLED) or from the ``worker.py`` CLI.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def register(self, name, interval, func, in_process=False):
+        self.jobs[name] = Job(name, interval, func, in_process)
+
+    def run(self, name):
+        job = self.jobs[name]
+        # One process never runs the same maintenance concurrently
+        with self._lock, self.app.app_context():
+            started = time.time()
+            try:
+                result = job.func()
+                job.last_error = None
+                self.app.logger.info('Job %s finished in %.2fs: %s', name, time.time() - started, result)
+            except Exception as e:
+                job.last_error = repr(e)
+                self.app.logger.exception('Job %s failed', name)
+            finally:
+                job.last_run = started
+                job.next_run = started + job.interval
+
+    def run_pending(self, now=None):
+        now = now or time.time()
+        for name, job in list(self.jobs.items()):
+            if job.next_run <= now:
+                self.run(name)
+
+    def next_wakeup(self):
+        return min((job.next_run for job in self.jobs.values()), default=time.time() + 60)
+
+    def run_forever(self, poll_interval=60):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(max(0, min(poll_interval, self.next_wakeup() - time.time())))
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run_forever, name='job-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+scheduler = Scheduler()
+
+# Identifies this process as the holder of job leases
+LEASE_HOLDER = f'{socket.gethostname()}:{os.getpid()}'
+
+
+def acquire_lease(name, seconds):
+    """Take or renew the lease on ``name`` for ``seconds``; False while
+    another live process holds it.
+
+    Jobs that must run in one process only (every web worker may run its own
+    scheduler) check this first. A holder that stops renewing loses the lease
+    once it expires.
+    """
+    from app import db
+    from app.models import JobLease
+
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=seconds)
+    renewed = db.session.execute(
+        update(JobLease)
+        .where(JobLease.name == name, or_(JobLease.holder == LEASE_HOLDER, JobLease.expires_at < now))
+        .values(holder=LEASE_HOLDER, expires_at=expires_at)
+    ).rowcount
+    if not renewed:
+        try:
+            db.session.execute(insert(JobLease).values(name=name, holder=LEASE_HOLDER, expires_at=expires_at))
+        except IntegrityError:
+            db.session.rollback()
+            return False
+    db.session.commit()
+    return True
+
+
+def refresh_task_counts():
+    """Recompute the date buckets and sidebar counters for today.
+
+    The counters live in the process-local task cache, so this only warms
+    the web process it runs in (JOBS_ENABLED) and worker.py leaves it out;
+    after midnight the first request no longer pays for the counting query.
+    """
+    from app.repository import count_buckets
+
+    return count_buckets(datetime.now().date())
+
+
+def archive_completed_tasks(days=None, batch_size=500):
+    """Move completed tasks not updated for ``days`` days to the archive table"""
+    from app import db
+    from app.models import Task, ArchivedTask
+    from app.saved_views import forget_tasks
+
+    days = days if days is not None else scheduler.app.config['ARCHIVE_AFTER_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    columns = [column.name for column in Task.__table__.columns]
+    archived = 0
+
+    criteria = (Task.status == 'completed', Task.last_updated_on < cutoff)
+    while True:
+        ids = [row.id for row in db.session.execute(select(Task.id).where(*criteria).limit(batch_size))]
+        if not ids:
+            break
+
+        # Copy and delete in one short transaction per batch. The criteria are
+        # checked again, since the write may start a new snapshot (see
+        # app/sqlite.py), and only the rows actually copied are deleted.
+        source = (select(*[Task.__table__.c[name] for name in columns], literal(datetime.utcnow()))
+                  .where(Task.id.in_(ids), *criteria))
+        db.session.execute(insert(ArchivedTask.__table__).from_select(columns + ['archived_on'], source))
+        ids = list(db.session.scalars(select(ArchivedTask.id).where(ArchivedTask.id.in_(ids))))
+        db.session.execute(delete(Task.__table__).where(Task.id.in_(ids)))
+        # Core statements skip the session hooks, so do their work here
+        forget_tasks(db.session, ids)
+        bump_generation(db.session.connection())
+        db.session.commit()
+        archived += len(ids)
+
+    return {'archived': archived}
+
+
+def optimize_database():
+    """Refresh planner statistics, and on SQLite reclaim free pages"""
+    from app import db
+
+    engine = db.engine
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        if engine.dialect.name == 'sqlite':
+            conn.exec_driver_sql('ANALYZE')
+            conn.exec_driver_sql('VACUUM')
+        else:
+            conn.exec_driver_sql('ANALYZE')
+    return {'dialect': engine.dialect.name}
+
+
+def init_app(app):
+    from app.history import compact_history
+    from app.reminders import fire_reminders
+    from app.saved_views import refresh_saved_views
+
+    scheduler.app = app
+    scheduler.register('refresh_task_counts', HOUR, refresh_task_counts, in_process=True)
+    scheduler.register('archive_completed_tasks', DAY, archive_completed_tasks)
+    scheduler.register('compact_task_history', DAY, compact_history)
+    scheduler.register('optimize_database', 7 * DAY, optimize_database)
+    scheduler.register('refresh_saved_views', HOUR, refresh_saved_views)
+    scheduler.register('fire_reminders', app.config.get('REMINDER_TICK_SECONDS', 60), fire_reminders)
+
+    if app.config.get('JOBS_ENABLED'):
+        scheduler.start()
@@ -0,0 +1,39 @@
+import threading
+from collections import defaultdict
+
+
+class RouteMetrics:
+    """Thread safe counters aggregated per route (Flask endpoint)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = defaultdict(lambda: defaultdict(float))
+
+    def add(self, route, **values):
+        route = route or 'other'
+        with self._lock:
+            counters = self._routes[route]
+            for name, value in values.items():
+                counters[name] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {route: dict(counters) for route, counters in self._routes.items()}
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+metrics = RouteMetrics()
+
+# WSGI environ key under which the matched endpoint is exposed to middleware
+ENDPOINT_ENVIRON_KEY = 'taskmaster.endpoint'
+
+
+def init_app(app):
+    from flask import request
+
+    @app.before_request
+    def _expose_endpoint():
+        request.environ[ENDPOINT_ENVIRON_KEY] = request.endpoint
@@ -1,6 +1,8 @@
 from app import db, login_manager
 from flask_login import UserMixin
+from sqlalchemy.orm import declared_attr
 from datetime import datetime
+import json
 from werkzeug.security import generate_password_hash, check_password_hash
 
 class User(UserMixin, db.Model):
@@ -22,22 +24,26 @@ class User(UserMixin, db.Model):
 def load_user(id):
     return User.query.get(int(id))
 
-class Task(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
+class TaskMixin:
+    """Columns shared by live tasks and their archived copies"""
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    due_date = db.Column(db.DateTime, nullable=False)
+    # Indexed for the reminder engine's range scans (and the date filters)
+    due_date = db.Column(db.DateTime, nullable=False, index=True)
     status = db.Column(db.String(20), default='not-started')
     remarks = db.Column(db.Text)
     created_on = db.Column(db.DateTime, default=datetime.utcnow)
-    last_updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_updated_on = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     created_by_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     created_by_name = db.Column(db.String(64))
     last_updated_by_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     last_updated_by_name = db.Column(db.String(64))
+    # Bumped on every update of a live task; edits compare it to the version
+    # they started from instead of locking the row
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     def __repr__(self):
-        return f'<Task {self.title}>'
+        return f'<{type(self).__name__} {self.title}>'
     
     def to_dict(self):
         return {
@@ -50,5 +56,119 @@ class Task(db.Model):
             'created_on': self.created_on.strftime('%Y-%m-%d %H:%M'),
             'last_updated_on': self.last_updated_on.strftime('%Y-%m-%d %H:%M'),
             'created_by_name': self.created_by_name,
-            'last_updated_by_name': self.last_updated_by_name
-        }
\ No newline at end of file
+            'last_updated_by_name': self.last_updated_by_name,
+            'version': self.version
+        }
+
+class Task(TaskMixin, db.Model):
+    # Ids must never be reused once a task has been archived or deleted
+    __table_args__ = {'sqlite_autoincrement': True}
+    id = db.Column(db.Integer, primary_key=True)
+    
+    # UPDATE and DELETE statements match on the version they loaded and raise
+    # StaleDataError when another writer got there first
+    @declared_attr.directive
+    def __mapper_args__(cls):
+        return {'version_id_col': cls.__table__.c.version}
+
+class ArchivedTask(TaskMixin, db.Model):
+    """Completed tasks moved out of the hot task table by the archive job"""
+    __tablename__ = 'archived_task'
+    # Keeps the id the task had in the task table
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    archived_on = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        data = super().to_dict()
+        data['archived_on'] = self.archived_on.strftime('%Y-%m-%d %H:%M')
+        return data
+
+class TaskEvent(db.Model):
+    """Append-only history of task changes.
+
+    ``changes`` holds compact JSON: the full state for ``create`` and
+    ``snapshot`` events, only the new values of changed fields for
+    ``update`` events and nothing for ``delete`` events.
+    """
+    __tablename__ = 'task_event'
+    __table_args__ = (db.Index('ix_task_event_task_id_ts', 'task_id', 'ts'),)
+    id = db.Column(db.Integer, primary_key=True)
+    # No foreign key: the history outlives archived and deleted tasks
+    task_id = db.Column(db.Integer, nullable=False)
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    user_id = db.Column(db.Integer)
+    kind = db.Column(db.String(10), nullable=False)
+    changes = db.Column(db.Text)
+    
+    def to_dict(self):
+        return {
+            'ts': self.ts.strftime('%Y-%m-%d %H:%M:%S'),
+            'user_id': self.user_id,
+            'kind': self.kind,
+            'changes': json.loads(self.changes) if self.changes else {}
+        }
+
+class ApiToken(db.Model):
+    """Bearer token for machine clients of the JSON API.
+
+    Only the SHA-256 of the token is stored; tokens are random enough that a
+    fast hash is as safe as a password hash and keeps verification cheap.
+    """
+    __tablename__ = 'api_token'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    name = db.Column(db.String(64), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    created_on = db.Column(db.DateTime, default=datetime.utcnow)
+    revoked_on = db.Column(db.DateTime)
+    user = db.relationship('User')
+    
+    def __repr__(self):
+        return f'<ApiToken {self.name}>'
+
+class SavedView(db.Model):
+    """A named task list filter whose matching task ids are kept materialized
+    in ``saved_view_task`` and counted in ``match_count``"""
+    __tablename__ = 'saved_view'
+    __table_args__ = (db.UniqueConstraint('user_id', 'name'),)
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    name = db.Column(db.String(64), nullable=False)
+    # TaskFilters fields as JSON
+    filters = db.Column(db.Text, nullable=False)
+    match_count = db.Column(db.Integer, nullable=False, default=0)
+    # Day the membership was computed for, for date based filters, which go
+    # stale at midnight until the refresh job recomputes them. NULL for the
+    # others: task writes and the archive job keep those current.
+    refreshed_for = db.Column(db.Date)
+    created_on = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SavedView {self.name}>'
+    
+    def is_current(self, today):
+        """Whether the members and match_count hold for ``today``"""
+        return self.refreshed_for is None or self.refreshed_for == today
+
+class SavedViewTask(db.Model):
+    """Membership of a live task in a saved view"""
+    __tablename__ = 'saved_view_task'
+    __table_args__ = (db.Index('ix_saved_view_task_task_id', 'task_id'),)
+    view_id = db.Column(db.Integer, db.ForeignKey('saved_view.id'), primary_key=True)
+    # No foreign key, like the history: rows of deleted tasks are removed
+    # with the task's flush, archived ones by the archive job
+    task_id = db.Column(db.Integer, primary_key=True)
+
+class CacheGeneration(db.Model):
+    """Counter bumped in the same transaction as every task write; each
+    process compares it with the generation of its task cache"""
+    __tablename__ = 'cache_generation'
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class JobLease(db.Model):
+    """Which process may run a job that must not run in several at once"""
+    __tablename__ = 'job_lease'
+    name = db.Column(db.String(64), primary_key=True)
+    holder = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
@@ -0,0 +1,160 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from flask import Response, abort, request
+
+# Distinct stacks kept per route; further new stacks are counted together
+MAX_STACKS_PER_ROUTE = 5000
+
+
+class SamplingProfiler:
+    """Statistical profiler for selected request threads.
+
+    A background thread wakes every ``interval`` seconds while at least one
+    request is being profiled and records the stack of each profiled thread
+    from ``sys._current_frames()``. Stacks are aggregated per route in the
+    collapsed format read by flamegraph.pl and speedscope. Requests that are
+    not profiled cost nothing beyond the sampling decision.
+    """
+
+    def __init__(self, interval=0.005, root=None, base=''):
+        self.interval = interval
+        # Frames below this code object (the WSGI server) are left out
+        self.root = root
+        # Project files are labelled relative to this directory
+        self.base = base
+        self._active = {}
+        self._stacks = defaultdict(Counter)
+        self._requests = Counter()
+        self._labels = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, route):
+        """Start sampling the calling thread on behalf of ``route``"""
+        with self._lock:
+            self._active[threading.get_ident()] = route
+            self._requests[route] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+            if not self._active:
+                self._wake.clear()
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            # Keep paths short and stable: package-relative for libraries,
+            # project-relative for the app
+            for marker in ('site-packages' + os.sep, 'lib' + os.sep + 'python'):
+                if marker in filename:
+                    filename = filename.split(marker, 1)[1]
+                    break
+            else:
+                if self.base and filename.startswith(self.base + os.sep):
+                    filename = filename[len(self.base) + 1:]
+            label = self._labels[code] = f'{filename}:{code.co_name}'
+        return label
+
+    def _collapse(self, frame):
+        labels = []
+        while frame is not None:
+            if frame.f_code is self.root:
+                break
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+    def sample(self):
+        with self._lock:
+            active = dict(self._active)
+        if not active:
+            return
+        frames = sys._current_frames()
+        collapsed = [(route, self._collapse(frames[ident])) for ident, route in active.items() if ident in frames]
+        with self._lock:
+            for route, stack in collapsed:
+                stacks = self._stacks[route]
+                if stack not in stacks and len(stacks) >= MAX_STACKS_PER_ROUTE:
+                    stack = '[other stacks]'
+                stacks[stack] += 1
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self.sample()
+            time.sleep(self.interval)
+
+    def collapsed(self, route=None):
+        """Collapsed stacks, one 'route;frame;...;frame count' line per stack"""
+        with self._lock:
+            lines = [f'{name};{stack} {count}'
+                     for name, stacks in sorted(self._stacks.items()) if route is None or name == route
+                     for stack, count in stacks.most_common()]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def summary(self):
+        with self._lock:
+            return {route: {'requests': self._requests[route], 'samples': sum(self._stacks[route].values())}
+                    for route in self._requests}
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+
+
+profiler = SamplingProfiler()
+
+
+def _token_matches(value, token):
+    return bool(token and value) and hmac.compare_digest(value.encode(), token.encode())
+
+
+def init_app(app):
+    """Profile a share of requests (PROFILING_ENABLED) or those asking for it
+    with the admin token, and serve the stacks from /admin/profiles"""
+    enabled = app.config.get('PROFILING_ENABLED', False)
+    rate = app.config.get('PROFILING_SAMPLE_RATE', 1.0) / 100
+    token = app.config.get('ADMIN_TOKEN', '')
+    profiler.interval = app.config.get('PROFILING_INTERVAL_MS', 5) / 1000
+    profiler.root = type(app).wsgi_app.__code__
+    profiler.base = os.path.dirname(app.root_path)
+
+    # Without a flag or an admin token there is nothing to hook into
+    if not enabled and not token:
+        return
+
+    @app.before_request
+    def _start_profiling():
+        if _token_matches(request.headers.get('X-Profile'), token) or (enabled and random.random() < rate):
+            profiler.start(request.endpoint or 'other')
+
+    @app.teardown_request
+    def _stop_profiling(exc):
+        profiler.stop()
+
+    def admin_profiles():
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+        if not _token_matches(supplied, token):
+            abort(403)
+        if request.method == 'DELETE':
+            profiler.reset()
+            return '', 204
+        if request.args.get('format') == 'json':
+            return {'routes': profiler.summary()}
+        return Response(profiler.collapsed(request.args.get('route')), mimetype='text/plain')
+
+    app.add_url_rule('/admin/profiles', 'admin_profiles', admin_profiles, methods=['GET', 'DELETE'])
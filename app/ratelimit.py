@@ -0,0 +1,251 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from flask import g, request
+from flask_login import current_user
+from sqlalchemy import event
+from werkzeug.exceptions import ServiceUnavailable, TooManyRequests
+
+from app.metrics import metrics
+
+try:
+    import redis
+except ImportError:  # redis is optional, only needed for a shared backend
+    redis = None
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+# Views that list tasks; with a search or the archive tier they become expensive
+LIST_ENDPOINTS = {'main.tasks', 'main.list_tasks', 'api.api_list_tasks'}
+
+
+class Limit(NamedTuple):
+    """A budget of ``count`` requests per ``period`` seconds, allowing bursts of ``count``"""
+    count: int
+    period: float
+
+    @property
+    def rate(self):
+        return self.count / self.period
+
+    def __str__(self):
+        return f'{self.count}/{self.period:g}s'
+
+
+def parse_limit(spec):
+    """Parse '30/minute', '5/second' or '100/10s' into a Limit"""
+    count, _, period = spec.partition('/')
+    period = period.strip()
+    if period in PERIODS:
+        seconds = PERIODS[period]
+    elif period.endswith('s') and period[:-1].replace('.', '', 1).isdigit():
+        seconds = float(period[:-1])
+    else:
+        raise ValueError(f"Invalid rate limit '{spec}', expected e.g. '30/minute'")
+    return Limit(int(count), seconds)
+
+
+class MemoryBackend:
+    """Token buckets held in this process.
+
+    With several workers every process keeps its own buckets, so the
+    effective budget is multiplied by the number of workers; use the redis
+    backend to share them.
+    """
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, limit, now):
+        """Take a token from a bucket; returns (allowed, tokens left)"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.count, now))
+            tokens = min(limit.count, tokens + (now - updated) * limit.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # Idle buckets are refilled anyway, dropping the oldest loses nothing
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBackend:
+    """Token buckets shared by all workers through redis"""
+
+    # Refill and take atomically; the bucket expires once it would be full again
+    SCRIPT = """
+    local count = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or count
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(count, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(count / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url, prefix='taskmaster:ratelimit:'):
+        if redis is None:
+            raise RuntimeError('RATELIMIT_STORAGE_URL points to redis but the redis package is not installed')
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._take = self._client.register_script(self.SCRIPT)
+
+    def take(self, key, limit, now):
+        allowed, tokens = self._take(keys=[self.prefix + key], args=[limit.count, limit.rate, now])
+        return bool(allowed), float(tokens)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+
+def create_backend(url):
+    if not url or url == 'memory://':
+        return MemoryBackend()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URL '{url}'")
+
+
+class RateLimiter:
+    """Per-user token buckets, with a separate budget for each route"""
+
+    def __init__(self, backend, default, routes=None):
+        self.backend = backend
+        self.default = default
+        self.routes = dict(routes or {})
+
+    def limit_for(self, budget):
+        return self.routes.get(budget, self.default)
+
+    def hit(self, identity, budget, now=None):
+        """Count a request; returns (allowed, limit, tokens left, seconds until the next token)"""
+        limit = self.limit_for(budget)
+        allowed, tokens = self.backend.take(f'{identity}:{budget}', limit, now if now is not None else time.time())
+        retry_after = 0 if allowed else (1 - tokens) / limit.rate
+        return allowed, limit, tokens, retry_after
+
+
+class LatencyMonitor:
+    """Exponentially weighted moving average of database statement latency"""
+
+    def __init__(self, alpha=0.1, stale_after=10):
+        self.alpha = alpha
+        self.stale_after = stale_after
+        self.average = None
+        self.updated = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, now=None):
+        with self._lock:
+            self.average = seconds if self.average is None else self.average + self.alpha * (seconds - self.average)
+            self.updated = now if now is not None else time.monotonic()
+
+    def current(self, now=None):
+        """The average in seconds, or None when no statement ran recently"""
+        now = now if now is not None else time.monotonic()
+        if self.average is None or now - self.updated > self.stale_after:
+            return None
+        return self.average
+
+    def watch(self, engine):
+        @event.listens_for(engine, 'before_cursor_execute')
+        def _start(conn, cursor, statement, parameters, context, executemany):
+            context.query_started = time.perf_counter()
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def _stop(conn, cursor, statement, parameters, context, executemany):
+            self.observe(time.perf_counter() - context.query_started)
+
+
+db_latency = LatencyMonitor()
+
+
+def is_expensive():
+    """Whether the current request is one to shed first under database pressure"""
+    if request.endpoint in LIST_ENDPOINTS:
+        return bool(request.args.get('search', '').strip() or request.args.get('include_archived'))
+    return False
+
+
+def _budget():
+    # Searches share one budget, whichever view they come from. Only their
+    # first page counts: the virtual list fetches the rest in pages served
+    # from the ids the first one cached.
+    if (request.endpoint in LIST_ENDPOINTS and request.args.get('search', '').strip()
+            and not request.args.get('offset', 0, type=int)):
+        return 'search'
+    return request.endpoint
+
+
+def _identity():
+    if current_user.is_authenticated:
+        return f'user:{current_user.get_id()}'
+    return f'ip:{request.remote_addr}'
+
+
+def init_app(app, db):
+    """Rate limit every view and shed expensive ones while the database is slow"""
+    shed_threshold = app.config.get('SHED_DB_LATENCY_MS', 0) / 1000
+    limiter = None
+    if app.config.get('RATELIMIT_ENABLED', True):
+        limiter = RateLimiter(
+            create_backend(app.config.get('RATELIMIT_STORAGE_URL', '')),
+            parse_limit(app.config.get('RATELIMIT_DEFAULT', '300/minute')),
+            {budget: parse_limit(spec) for budget, spec in app.config.get('RATELIMIT_ROUTES', {}).items()},
+        )
+    app.extensions['ratelimit'] = limiter
+
+    if shed_threshold:
+        with app.app_context():
+            for engine in db.engines.values():
+                db_latency.watch(engine)
+
+    @app.before_request
+    def _admit():
+        if request.endpoint in (None, 'static'):
+            return
+
+        # Shedding comes first: a rejected request should not spend a token
+        if shed_threshold and is_expensive():
+            latency = db_latency.current()
+            if latency is not None and latency > shed_threshold:
+                metrics.add(request.endpoint, admission_shed=1)
+                raise ServiceUnavailable('The server is busy, please retry shortly.', retry_after=5)
+
+        if limiter is None:
+            return
+        allowed, limit, tokens, retry_after = limiter.hit(_identity(), _budget())
+        g.ratelimit = (limit, tokens)
+        if not allowed:
+            metrics.add(request.endpoint, ratelimit_limited=1)
+            raise TooManyRequests(f'Rate limit of {limit} exceeded.', retry_after=math.ceil(retry_after))
+        metrics.add(request.endpoint, ratelimit_allowed=1)
+
+    @app.after_request
+    def _ratelimit_headers(response):
+        if 'ratelimit' in g:
+            limit, tokens = g.ratelimit
+            response.headers['X-RateLimit-Limit'] = str(limit.count)
+            response.headers['X-RateLimit-Remaining'] = str(int(tokens))
+        return response
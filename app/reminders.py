@@ -0,0 +1,255 @@
+import heapq
+import itertools
+import json
+import logging
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import event, select
+
+logger = logging.getLogger('taskmaster.reminders')
+
+
+class LogSink:
+    """Writes reminder events to the log, standing in for a real notifier"""
+
+    def send(self, reminder):
+        logger.info('%s: task %s "%s" due %s', reminder['kind'], reminder['task_id'], reminder['title'],
+                    reminder['due_date'])
+
+
+class WebhookSink:
+    """POSTs every reminder event as JSON to a URL"""
+
+    def __init__(self, url, timeout=5):
+        if not url:
+            raise ValueError('REMINDER_SINK is webhook but REMINDER_WEBHOOK_URL is not set')
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, reminder):
+        request = urllib.request.Request(self.url, data=json.dumps(reminder).encode(), method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+def create_sink(config):
+    kind = config.get('REMINDER_SINK', 'log')
+    if kind == 'log':
+        return LogSink()
+    if kind == 'webhook':
+        return WebhookSink(config.get('REMINDER_WEBHOOK_URL'))
+    raise ValueError(f"Unknown REMINDER_SINK '{kind}', expected 'log' or 'webhook'")
+
+
+def overdue_at(due_date):
+    """When a task becomes overdue: the overdue filter counts it from the day after its due date"""
+    return datetime.combine(due_date.date() + timedelta(days=1), time.min)
+
+
+class ReminderEngine:
+    """Min-heap of upcoming reminder events for open tasks.
+
+    The heap only holds events up to a horizon; it is filled from an index
+    range scan on ``due_date`` and topped up as the horizon moves, and task
+    writes push new events or invalidate old ones. A tick pops the events
+    that are due, so its work follows the number of reminders sent rather
+    than the number of tasks.
+    """
+
+    def __init__(self, offsets=(timedelta(days=1), timedelta(hours=1), timedelta(0)), horizon=timedelta(hours=48),
+                 sink=None):
+        self.offsets = sorted(offsets, reverse=True)
+        self.horizon = horizon
+        self.sink = sink or LogSink()
+        # (fire at, schedule, task id, offset, due date) of every pending event
+        self._heap = []
+        # (due date, schedule) of each task with pending events. Rescheduling
+        # a task starts a new schedule, which turns its older events stale;
+        # stale events are skipped when popped instead of searched for.
+        self._due = {}
+        self._schedules = itertools.count()
+        self._lock = threading.Lock()
+        self.last_tick = None
+        self.loaded_until = None
+        self.last_sync = None
+        self.fired = 0
+
+    @property
+    def started(self):
+        return self.last_tick is not None
+
+    @property
+    def pending(self):
+        return len(self._heap)
+
+    def _push(self, task_id, due_date, after, until):
+        # Only events in (after, until]: earlier ones were already due, later
+        # ones are loaded when the horizon gets there
+        current = self._due.get(task_id)
+        schedule = current[1] if current and current[0] == due_date else next(self._schedules)
+        deadline = overdue_at(due_date)
+        for offset in self.offsets:
+            fire_at = deadline - offset
+            if after < fire_at <= until:
+                heapq.heappush(self._heap, (fire_at, schedule, task_id, offset, due_date))
+                self._due[task_id] = (due_date, schedule)
+
+    def track(self, task_id, due_date, status):
+        """Apply a task write: reschedule a moved due date, drop completed or deleted tasks"""
+        with self._lock:
+            if not self.started:
+                return
+            if due_date is None or status == 'completed':
+                self._due.pop(task_id, None)
+            elif self._due.get(task_id, (None,))[0] != due_date:
+                self._due.pop(task_id, None)
+                self._push(task_id, due_date, self.last_tick, self.loaded_until)
+
+    def _load(self, session, Task, after, until):
+        # Index range scan for the tasks with an event in (after, until]
+        earliest = after + self.offsets[-1] - timedelta(days=1)
+        rows = session.execute(
+            select(Task.id, Task.due_date)
+            .where(Task.due_date >= earliest, Task.due_date < until + self.offsets[0], Task.status != 'completed')
+        )
+        for task_id, due_date in rows:
+            self._push(task_id, due_date, after, until)
+
+    def _sync(self, session, Task):
+        # Catch up with writes made by other processes since the last tick
+        started = datetime.utcnow()
+        rows = session.execute(
+            select(Task.id, Task.due_date, Task.status).where(Task.last_updated_on >= self.last_sync)
+        ).all()
+        self.last_sync = started
+        return rows
+
+    def tick(self, session, Task, now=None):
+        """The reminders that became due since the last tick, still to be delivered"""
+        now = now or datetime.now()
+        with self._lock:
+            if not self.started:
+                self.last_tick = self.loaded_until = now
+                self.last_sync = datetime.utcnow()
+            changed = self._sync(session, Task)
+        for task_id, due_date, status in changed:
+            self.track(task_id, due_date, status)
+
+        with self._lock:
+            if self.loaded_until < now + self.horizon / 2:
+                until = now + self.horizon
+                self._load(session, Task, self.loaded_until, until)
+                self.loaded_until = until
+
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, schedule, task_id, offset, due_date = heapq.heappop(self._heap)
+                if self._due.get(task_id) != (due_date, schedule):
+                    continue
+                due.append((fire_at, task_id, offset, due_date))
+                if offset == self.offsets[-1]:
+                    del self._due[task_id]
+            self.last_tick = now
+
+        # Confirm against the database, which may have changed in another process
+        tasks = {}
+        if due:
+            ids = {task_id for _, task_id, _, _ in due}
+            tasks = {task.id: task for task in session.execute(
+                select(Task.id, Task.title, Task.due_date, Task.status).where(Task.id.in_(ids)))}
+
+        reminders = []
+        for fire_at, task_id, offset, due_date in due:
+            task = tasks.get(task_id)
+            if task is None or task.status == 'completed' or task.due_date != due_date:
+                continue
+            reminders.append({
+                'kind': 'overdue' if offset == timedelta(0) else 'reminder',
+                'task_id': task_id,
+                'title': task.title,
+                'due_date': due_date.strftime('%Y-%m-%d'),
+                'minutes_before': int(offset.total_seconds() // 60),
+                'fire_at': fire_at.isoformat(timespec='seconds'),
+            })
+        return reminders
+
+    def deliver(self, reminders):
+        """Hand reminders to the sink; a failed one is logged and skipped"""
+        sent = failed = 0
+        for reminder in reminders:
+            try:
+                self.sink.send(reminder)
+                sent += 1
+            except Exception:
+                logger.exception('Sending reminder for task %s failed', reminder['task_id'])
+                failed += 1
+        self.fired += sent
+        return {'sent': sent, 'failed': failed}
+
+    def reset(self):
+        """Forget all events; the next tick starts over from the database"""
+        with self._lock:
+            self._heap.clear()
+            self._due.clear()
+            self.last_tick = self.loaded_until = self.last_sync = None
+
+
+reminder_engine = ReminderEngine()
+
+# Sinks may be slow (a webhook waits up to its timeout), so delivery runs in
+# its own thread instead of holding up the scheduler and the other jobs
+_delivery = ThreadPoolExecutor(max_workers=1, thread_name_prefix='reminder-delivery')
+
+
+def fire_reminders():
+    """Scheduler job: queue the reminders that became due for delivery.
+
+    Every process with JOBS_ENABLED runs this job, so only the holder of the
+    'fire_reminders' lease sends anything; the others drop their events and
+    start over from the database if they take the lease over later.
+    """
+    from app import db
+    from app.jobs import acquire_lease, scheduler
+    from app.models import Task
+
+    # The lease outlives a couple of missed ticks before another process takes over
+    if not acquire_lease('fire_reminders', 3 * scheduler.jobs['fire_reminders'].interval):
+        reminder_engine.reset()
+        return {'skipped': 'another process holds the lease'}
+    reminders = reminder_engine.tick(db.session, Task)
+    if reminders:
+        _delivery.submit(reminder_engine.deliver, reminders)
+    return {'queued': len(reminders), 'pending': reminder_engine.pending}
+
+
+def init_app(app, db):
+    """Configure the reminder engine and keep it current with task writes"""
+    from app.models import Task
+
+    reminder_engine.offsets = sorted((timedelta(minutes=minutes) for minutes in app.config['REMINDER_OFFSETS_MINUTES']),
+                                     reverse=True)
+    reminder_engine.horizon = timedelta(hours=app.config.get('REMINDER_HORIZON_HOURS', 48))
+    reminder_engine.sink = create_sink(app.config)
+
+    @event.listens_for(db.session, 'after_flush')
+    def _note_due_dates(session, flush_context):
+        changes = session.info.setdefault('reminder_changes', [])
+        for task in session.new | session.dirty:
+            if isinstance(task, Task):
+                changes.append((task.id, task.due_date, task.status))
+        for task in session.deleted:
+            if isinstance(task, Task):
+                changes.append((task.id, None, None))
+
+    @event.listens_for(db.session, 'after_commit')
+    def _apply_due_dates(session):
+        for change in session.info.pop('reminder_changes', ()):
+            reminder_engine.track(*change)
+
+    @event.listens_for(db.session, 'after_rollback')
+    def _forget_due_dates(session):
+        session.info.pop('reminder_changes', None)
@@ -0,0 +1,79 @@
+import itertools
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# Views that only read from the database and can be served from a replica.
+# Everything else (new_task, edit_task, delete_task, update_task_status, ...)
+# always goes to the primary.
+READ_ONLY_ENDPOINTS = {'main.index', 'main.tasks', 'main.list_tasks', 'main.get_task', 'main.get_task_history',
+                       'main.saved_view', 'api.api_list_tasks', 'api.api_get_task'}
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+_next_replica = itertools.count()
+
+
+def replica_binds(urls):
+    """Build the SQLALCHEMY_BINDS entries for the configured replica URLs"""
+    return {f'{REPLICA_BIND_PREFIX}{i}': url for i, url in enumerate(urls)}
+
+
+class RoutingSession(Session):
+    """Session that sends reads from read-only views to a replica engine.
+
+    Flushes, and anything issued once the session holds pending changes,
+    always use the primary so a request never writes to a replica.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not (self.new or self.dirty or self.deleted):
+            engine = current_replica()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def current_replica():
+    """The replica engine serving this request's reads, if any"""
+    if not has_request_context():
+        return None
+    return g.get('replica_engine')
+
+
+def _pick_replica(db):
+    keys = [key for key in db.engines if key and key.startswith(REPLICA_BIND_PREFIX)]
+    if not keys:
+        return None
+    keys.sort()
+    return db.engines[keys[next(_next_replica) % len(keys)]]
+
+
+def init_app(app, db):
+    """Register the request hooks that decide where each request reads from"""
+    sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+    read_endpoints = set(app.config.get('REPLICA_READ_ENDPOINTS', READ_ONLY_ENDPOINTS))
+
+    @app.before_request
+    def _route_reads():
+        g.replica_engine = None
+        if request.endpoint not in read_endpoints:
+            return
+        # Read-your-writes: a user who just wrote keeps reading from the
+        # primary until the replicas have had time to catch up.
+        if session.get('_primary_until', 0) > time.time():
+            return
+        g.replica_engine = _pick_replica(db)
+
+    @app.after_request
+    def _stick_to_primary(response):
+        if g.get('db_wrote'):
+            session['_primary_until'] = time.time() + sticky_seconds
+        return response
+
+    @event.listens_for(db.session, 'after_flush')
+    def _mark_write(db_session, flush_context):
+        if has_request_context():
+            g.db_wrote = True
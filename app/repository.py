@@ -0,0 +1,235 @@
+"""Query layer for tasks.
+
+Every statement is built once per shape (which filters are active, which sort)
+with ``bindparam`` placeholders and kept for the life of the process. SQLAlchemy
+memoizes the cache key of a statement object, so a request only binds new
+values and hits the compiled cache, instead of building a Query chain and
+deriving its cache key every time. List results are cached in the task cache.
+"""
+from datetime import date, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import and_, bindparam, case, func, literal, or_, select, union_all
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import BindParameter
+
+from app import db
+from app.models import Task, ArchivedTask, SavedViewTask
+from app.cache import task_cache, current_generation, id_list
+from app.replicas import current_replica
+
+FILTER_TYPES = ('all', 'today', 'upcoming', 'overdue')
+
+# Filters whose matches change at midnight without any task write
+DATE_FILTERS = ('today', 'upcoming', 'overdue')
+
+# Columns the task list can be sorted by
+SORT_COLUMNS = {
+    'due_date': 'due_date',
+    'created_date': 'created_on',
+    'title': 'title',
+    'status': 'status',
+}
+
+# Prebuilt statements by shape; shapes are bounded by the filter and sort options
+_statements = {}
+
+class TaskFilters(NamedTuple):
+    """Normalized arguments of a task list view"""
+    filter_type: str = 'all'
+    status: str = ''
+    search: str = ''
+    sort_by: str = 'due_date'
+    sort_order: str = 'asc'
+    include_archived: bool = False
+
+    @classmethod
+    def from_args(cls, args) -> 'TaskFilters':
+        """Build filters from a query string, normalized so equivalent URLs
+        share a cache entry"""
+        filter_type = args.get('filter', 'all')
+        sort_by = args.get('sort_by', 'due_date')
+        return cls(
+            filter_type=filter_type if filter_type in FILTER_TYPES else 'all',
+            status=args.get('status', ''),
+            search=args.get('search', '').strip(),
+            sort_by=sort_by if sort_by in SORT_COLUMNS else 'due_date',
+            sort_order='desc' if args.get('sort_order') == 'desc' else 'asc',
+            include_archived=args.get('include_archived', '') in ('1', 'true', 'yes'),
+        )
+
+    def params(self, today: date) -> dict:
+        """Values for the placeholders of the list statements"""
+        return {
+            'today': today,
+            'tomorrow': today + timedelta(days=1),
+            'next_week': today + timedelta(days=7),
+            'status': self.status,
+            'search': f"%{self.search}%",
+        }
+
+def _statement(key, build):
+    stmt = _statements.get(key)
+    if stmt is None:
+        stmt = _statements[key] = build()
+    return stmt
+
+def task_filters(model, filter_type, has_status, has_search):
+    """WHERE criteria of a list view for the hot (Task) or cold (ArchivedTask) tier"""
+    criteria = []
+
+    if filter_type == 'today':
+        criteria += [model.due_date >= bindparam('today'), model.due_date < bindparam('tomorrow')]
+    elif filter_type == 'upcoming':
+        criteria += [model.due_date >= bindparam('today'), model.due_date <= bindparam('next_week'),
+                     model.status != 'completed']
+    elif filter_type == 'overdue':
+        criteria += [model.due_date < bindparam('today'), model.status != 'completed']
+
+    if has_status:
+        criteria.append(model.status == bindparam('status'))
+
+    if has_search:
+        search = bindparam('search')
+        criteria.append(or_(model.title.like(search), model.description.like(search), model.remarks.like(search)))
+
+    return criteria
+
+def _build_ids_statement(filter_type, has_status, has_search, sort_by, sort_order, include_archived):
+    column = SORT_COLUMNS[sort_by]
+    direction = 'desc' if sort_order == 'desc' else 'asc'
+
+    if not include_archived:
+        return (select(Task.id)
+                .where(*task_filters(Task, filter_type, has_status, has_search))
+                .order_by(getattr(getattr(Task, column), direction)(), Task.id))
+
+    # Archived rows are returned with negated ids so both tiers fit in one id array
+    hot = (select(Task.id.label('id'), getattr(Task, column).label('sort_key'))
+           .where(*task_filters(Task, filter_type, has_status, has_search)))
+    cold = (select((-ArchivedTask.id).label('id'), getattr(ArchivedTask, column).label('sort_key'))
+            .where(*task_filters(ArchivedTask, filter_type, has_status, has_search)))
+    both = union_all(hot, cold).subquery()
+    return select(both.c.id).order_by(getattr(both.c.sort_key, direction)(), both.c.id)
+
+def ids_statement(filters: TaskFilters):
+    """The prebuilt statement selecting the ordered ids of a list view"""
+    shape = (filters.filter_type, bool(filters.status), bool(filters.search),
+             filters.sort_by, filters.sort_order, filters.include_archived)
+    return _statement(('ids',) + shape, lambda: _build_ids_statement(*shape))
+
+def _bind_values(criterion, values):
+    # A copy with anonymous parameters holding the values, so the criteria of
+    # several list views fit in one statement
+    def replace(element):
+        if isinstance(element, BindParameter) and element.key in values:
+            return bindparam(None, values[element.key], type_=element.type, unique=True)
+        return None
+    return visitors.replacement_traverse(criterion, {}, replace)
+
+def matching_statement(filters_list, today: date):
+    """A statement telling which list views each live task in the expanding
+    ``ids`` parameter matches: its id, then a 0/1 column per view, with the
+    list query's own criteria"""
+    columns = []
+    for filters in filters_list:
+        criteria = task_filters(Task, filters.filter_type, bool(filters.status), bool(filters.search))
+        values = filters.params(today)
+        if criteria:
+            columns.append(case((and_(*[_bind_values(criterion, values) for criterion in criteria]), 1), else_=0))
+        else:
+            columns.append(literal(1))
+    return select(Task.id, *columns).where(Task.id.in_(bindparam('ids', expanding=True)))
+
+def _cache_ttl(source):
+    # A replica may not have the write that bumped the generation yet, so what
+    # it returns can only be trusted for a while
+    return task_cache.replica_ttl if source == 'replica' else None
+
+def list_task_ids(filters: TaskFilters, today: date):
+    """Ordered ids of the tasks matching a list view, cached per filter combination.
+
+    With ``include_archived`` archived tasks are included as negative ids.
+    """
+    # Date based filters change meaning at midnight, so the day is part of their key
+    day = today if filters.filter_type in DATE_FILTERS else None
+    # Lagging replicas must not feed stale lists to users reading from the primary
+    source = 'replica' if current_replica() is not None else 'primary'
+    key = ('task_ids', filters, day, source)
+
+    generation = current_generation()
+    ids = task_cache.get(key)
+    if ids is None:
+        ids = id_list(db.session.scalars(ids_statement(filters), filters.params(today)))
+        task_cache.put(key, ids, generation, _cache_ttl(source))
+    return ids
+
+def _build_view_ids_statement(sort_by, sort_order):
+    column = getattr(Task, SORT_COLUMNS[sort_by])
+    return (select(Task.id)
+            .join(SavedViewTask, SavedViewTask.task_id == Task.id)
+            .where(SavedViewTask.view_id == bindparam('view_id'))
+            .order_by(column.desc() if sort_order == 'desc' else column.asc(), Task.id))
+
+def view_task_ids(view_id: int, filters: TaskFilters):
+    """Ordered ids of the tasks materialized for a saved view"""
+    shape = (filters.sort_by, filters.sort_order)
+    stmt = _statement(('view_ids',) + shape, lambda: _build_view_ids_statement(*shape))
+    return list(db.session.scalars(stmt, {'view_id': view_id}))
+
+def load_tasks(ids):
+    """Hydrate tasks for the given ids, keeping their order"""
+    hot_ids = [task_id for task_id in ids if task_id > 0]
+    cold_ids = [-task_id for task_id in ids if task_id < 0]
+    rows = {}
+    for model, model_ids, sign in ((Task, hot_ids, 1), (ArchivedTask, cold_ids, -1)):
+        if model_ids:
+            stmt = _statement(('load', model), lambda: select(model).where(model.id.in_(bindparam('ids', expanding=True))))
+            rows.update((sign * task.id, task) for task in db.session.scalars(stmt, {'ids': model_ids}))
+    return [rows[task_id] for task_id in ids if task_id in rows]
+
+def get_task(task_id: int, include_archived: bool = False):
+    """A live task, falling back to the archive when asked; None if missing"""
+    task = db.session.get(Task, task_id)
+    if task is None and include_archived:
+        task = db.session.get(ArchivedTask, task_id)
+    return task
+
+BUCKETS = ('all', 'today', 'upcoming', 'overdue', 'not_started', 'in_progress', 'completed')
+
+def _build_counts_statement(model):
+    # One scan with conditional aggregates instead of a COUNT query per bucket
+    def bucket(*criteria):
+        return func.sum(case((and_(*criteria), 1), else_=0))
+
+    today, tomorrow, next_week = bindparam('today'), bindparam('tomorrow'), bindparam('next_week')
+    return select(
+        func.count(model.id),
+        bucket(model.due_date >= today, model.due_date < tomorrow),
+        bucket(model.due_date >= today, model.due_date <= next_week, model.status != 'completed'),
+        bucket(model.due_date < today, model.status != 'completed'),
+        bucket(model.status == 'not-started'),
+        bucket(model.status == 'in-progress'),
+        bucket(model.status == 'completed'),
+    )
+
+def _bucket_counts(model, today: date):
+    stmt = _statement(('counts', model), lambda: _build_counts_statement(model))
+    row = db.session.execute(stmt, TaskFilters().params(today)).one()
+    return {bucket: int(count or 0) for bucket, count in zip(BUCKETS, row)}
+
+def count_buckets(today: date, include_archived: bool = False) -> dict:
+    """Sidebar counts for every filter and status bucket"""
+    source = 'replica' if current_replica() is not None else 'primary'
+    key = ('task_counts', today, include_archived, source)
+    generation = current_generation()
+    counts = task_cache.get(key)
+    if counts is not None:
+        return counts
+
+    counts = _bucket_counts(Task, today)
+    if include_archived:
+        for bucket, count in _bucket_counts(ArchivedTask, today).items():
+            counts[bucket] += count
+    task_cache.put(key, counts, generation, _cache_ttl(source))
+    return counts
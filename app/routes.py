@@ -1,164 +1,195 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, abort, json
 from flask_login import login_user, logout_user, login_required, current_user
 from app import app, db
-from app.models import User, Task
-from datetime import datetime, timedelta
+from app.models import User, Task, ArchivedTask, SavedView
+from app.forms import LoginForm, RegisterForm, TaskForm, SavedViewForm
+from app.cache import task_cache
+from app.repository import TaskFilters, list_task_ids, count_buckets, load_tasks, view_task_ids, get_task as find_task
+from app.metrics import metrics
+from app.ratelimit import db_latency
+from app.history import task_history
+from app.saved_views import dump_filters, load_filters, refresh_view, user_views, delete_view
+from app.tokens import TokenUser
+from datetime import datetime
+from functools import wraps
 from urllib.parse import urlparse
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.exceptions import HTTPException
+
+auth = Blueprint('auth', __name__)
+main = Blueprint('main', __name__)
+# Read API for machine clients, authenticated with bearer tokens only
+api = Blueprint('api', __name__, url_prefix='/api/v1')
 
 # Routes for authentication
-@app.route('/login', methods=['GET', 'POST'])
+@auth.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-        remember_me = 'remember_me' in request.form
-        
-        user = User.query.filter_by(username=username).first()
-        if user is None or not user.check_password(password):
+    form = LoginForm()
+    if form.validate_on_submit():
+        user = User.query.filter_by(username=form.username.data).first()
+        if user is None or not user.check_password(form.password.data):
             flash('Invalid username or password', 'danger')
-            return redirect(url_for('login'))
+            return redirect(url_for('auth.login'))
         
-        login_user(user, remember=remember_me)
+        login_user(user, remember=form.remember_me.data)
         next_page = request.args.get('next')
         if not next_page or urlparse(next_page).netloc != '':
-            next_page = url_for('index')
+            next_page = url_for('main.index')
         
         flash('You have been logged in successfully!', 'success')
         return redirect(next_page)
     
-    return render_template('login.html', title='Sign In')
+    return render_template('login.html', title='Sign In', form=form)
 
-@app.route('/register', methods=['GET', 'POST'])
+@auth.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
-    if request.method == 'POST':
-        username = request.form['username']
-        password = request.form['password']
-        confirm_password = request.form['confirm_password']
-        
-        if password != confirm_password:
-            flash('Passwords do not match', 'danger')
-            return redirect(url_for('register'))
-        
-        if User.query.filter_by(username=username).first():
-            flash('Username already exists', 'danger')
-            return redirect(url_for('register'))
-        
+    form = RegisterForm()
+    if form.validate_on_submit():
         user = User()
-        user.username = username
-        user.set_password(password)
+        user.username = form.username.data
+        user.set_password(form.password.data)
         
         db.session.add(user)
         db.session.commit()
         
         flash('Congratulations, you are now a registered user!', 'success')
-        return redirect(url_for('login'))
+        return redirect(url_for('auth.login'))
     
-    return render_template('register.html', title='Register')
+    return render_template('register.html', title='Register', form=form)
 
-@app.route('/logout')
+@auth.route('/logout')
 def logout():
     logout_user()
     flash('You have been logged out', 'info')
-    return redirect(url_for('login'))
+    return redirect(url_for('auth.login'))
 
 # Routes for task management
-@app.route('/')
+@main.route('/')
+@login_required
 def index():
-    return redirect(url_for('tasks'))
+    counts = count_buckets(datetime.now().date())
+    return render_template('index.html', task_counts=counts)
 
-@app.route('/tasks')
+def _list_context(filters, today, **extra):
+    return dict(filter_type=filters.filter_type,
+                status_filter=filters.status,
+                search_query=filters.search,
+                sort_by=filters.sort_by,
+                sort_order=filters.sort_order,
+                include_archived=filters.include_archived,
+                task_counts=count_buckets(today, filters.include_archived),
+                saved_views=user_views(current_user.id),
+                today=today,
+                **extra)
+
+def _task_page_template(ids, context):
+    page = request.args.get('page', 1, type=int)
+    per_page = app.config['TASKS_PER_PAGE']
+    
+    # Only hydrate the rows shown on this page
+    total = len(ids)
+    pages = max(1, -(-total // per_page))
+    page = min(max(page, 1), pages)
+    tasks = load_tasks(ids[(page - 1) * per_page:page * per_page])
+    
+    return render_template('tasks.html', 
+                          virtual=False,
+                          tasks=tasks, 
+                          total=total,
+                          page=page,
+                          pages=pages,
+                          **context)
+
+@main.route('/tasks')
 @login_required
 def tasks():
-    filter_type = request.args.get('filter', 'all')
-    status_filter = request.args.get('status', '')
-    search_query = request.args.get('search', '')
-    
-    # Base query
-    query = Task.query
-    
-    # Apply filters
-    if filter_type == 'today':
-        today = datetime.now().date()
-        tomorrow = today + timedelta(days=1)
-        query = query.filter(Task.due_date >= today, Task.due_date < tomorrow)
-    elif filter_type == 'upcoming':
-        today = datetime.now().date()
-        next_week = today + timedelta(days=7)
-        query = query.filter(Task.due_date >= today, Task.due_date <= next_week, Task.status != 'completed')
-    elif filter_type == 'overdue':
-        today = datetime.now().date()
-        query = query.filter(Task.due_date < today, Task.status != 'completed')
-    
-    # Apply status filter
-    if status_filter:
-        query = query.filter(Task.status == status_filter)
-    
-    # Apply search
-    if search_query:
-        search = f"%{search_query}%"
-        query = query.filter(
-            (Task.title.like(search)) | 
-            (Task.description.like(search)) | 
-            (Task.remarks.like(search))
-        )
-    
-    tasks = query.all()
-    
-    # Get counts for different types of tasks
-    all_tasks = Task.query.count()
+    filters = TaskFilters.from_args(request.args)
+    view = request.args.get('view', 'virtual' if app.config['TASKS_VIRTUAL_LIST'] else 'cards')
     today = datetime.now().date()
-    tomorrow = today + timedelta(days=1)
-    today_tasks = Task.query.filter(Task.due_date >= today, Task.due_date < tomorrow).count()
-    upcoming_tasks = Task.query.filter(Task.due_date >= today, Task.due_date <= today + timedelta(days=7), Task.status != 'completed').count()
-    overdue_tasks = Task.query.filter(Task.due_date < today, Task.status != 'completed').count()
-    not_started_tasks = Task.query.filter(Task.status == 'not-started').count()
-    in_progress_tasks = Task.query.filter(Task.status == 'in-progress').count()
-    completed_tasks = Task.query.filter(Task.status == 'completed').count()
-    
-    task_counts = {
-        'all': all_tasks,
-        'today': today_tasks,
-        'upcoming': upcoming_tasks,
-        'overdue': overdue_tasks,
-        'not_started': not_started_tasks,
-        'in_progress': in_progress_tasks,
-        'completed': completed_tasks
-    }
+    view_form = SavedViewForm(formdata=None, filter=filters.filter_type, status=filters.status, search=filters.search,
+                              sort_by=filters.sort_by, sort_order=filters.sort_order)
+    context = _list_context(filters, today, view_form=view_form)
     
-    return render_template('tasks.html', 
-                          tasks=tasks, 
-                          filter_type=filter_type,
-                          status_filter=status_filter,
-                          search_query=search_query,
-                          task_counts=task_counts,
-                          today=today)
+    # The virtual list ships an empty shell and fetches rows from /api/tasks,
+    # so the page costs the same no matter how many tasks match
+    if view == 'virtual':
+        return render_template('tasks.html', virtual=True, tasks=[], total=None, page=1, pages=1, **context)
+    
+    return _task_page_template(list_task_ids(filters, today), context)
+
+# Saved views: the matching ids are materialized, so opening one is a lookup
+@main.route('/views', methods=['POST'])
+@login_required
+def save_view():
+    form = SavedViewForm()
+    filters = TaskFilters.from_args(request.form)
+    back = url_for('main.tasks', filter=filters.filter_type, status=filters.status, search=filters.search,
+                   sort_by=filters.sort_by, sort_order=filters.sort_order)
+    if not form.validate_on_submit():
+        flash('Give the view a name of at most 64 characters.', 'danger')
+        return redirect(back)
+    
+    name = form.name.data.strip()
+    if SavedView.query.filter_by(user_id=current_user.id, name=name).first() is not None:
+        flash(f'You already have a view named "{name}".', 'warning')
+        return redirect(back)
+    
+    view = SavedView(user_id=current_user.id, name=name, filters=dump_filters(filters))
+    db.session.add(view)
+    db.session.flush()
+    refresh_view(db.session, view, datetime.now().date())
+    db.session.commit()
+    
+    flash(f'View "{name}" saved.', 'success')
+    return redirect(url_for('main.saved_view', view_id=view.id))
+
+@main.route('/views/<int:view_id>')
+@login_required
+def saved_view(view_id):
+    view = SavedView.query.filter_by(id=view_id, user_id=current_user.id).first_or_404()
+    today = datetime.now().date()
+    filters = load_filters(view.filters)
+    # Until the refresh job has caught up with today (date filters move at
+    # midnight) the stored members may be stale; run the list query instead
+    # of writing from a GET
+    if view.is_current(today):
+        ids = view_task_ids(view.id, filters)
+    else:
+        ids = list_task_ids(filters, today)
+    
+    context = _list_context(filters, today, saved_view=view)
+    return _task_page_template(ids, context)
+
+@main.route('/views/<int:view_id>/delete', methods=['POST'])
+@login_required
+def delete_saved_view(view_id):
+    view = SavedView.query.filter_by(id=view_id, user_id=current_user.id).first_or_404()
+    delete_view(db.session, view)
+    db.session.commit()
+    flash(f'View "{view.name}" deleted.', 'success')
+    return redirect(url_for('main.tasks'))
+
+def _due_datetime(due_date):
+    # The form yields a date, the column stores a datetime
+    return datetime.combine(due_date, datetime.min.time())
 
-@app.route('/tasks/new', methods=['GET', 'POST'])
+@main.route('/tasks/new', methods=['GET', 'POST'])
 @login_required
 def new_task():
-    if request.method == 'POST':
-        title = request.form['title']
-        description = request.form['description']
-        due_date_str = request.form['due_date']
-        status = request.form['status']
-        remarks = request.form['remarks']
-        
-        # Convert string date to datetime
-        due_date = datetime.strptime(due_date_str, '%Y-%m-%d')
-        
-        # Create new task
+    form = TaskForm()
+    if form.validate_on_submit():
         task = Task()
-        task.title = title
-        task.description = description
-        task.due_date = due_date
-        task.status = status
-        task.remarks = remarks
+        task.title = form.title.data
+        task.description = form.description.data
+        task.due_date = _due_datetime(form.due_date.data)
+        task.status = form.status.data
+        task.remarks = form.remarks.data
         task.created_by_id = current_user.id
         task.created_by_name = current_user.username
         task.last_updated_by_id = current_user.id
@@ -168,57 +199,204 @@ def new_task():
         db.session.commit()
         
         flash('Task created successfully!', 'success')
-        return redirect(url_for('tasks'))
+        return redirect(url_for('main.tasks'))
+    
+    return render_template('task_form.html', form=form, task=None, title="New Task")
+
+def _edit_conflict(form, task_id):
+    """Re-render the form after a lost update: the user's input is kept, the
+    current values of the fields they disagree on are shown next to it, and
+    saving again overwrites the current version knowingly"""
+    task = db.session.get(Task, task_id)
+    if task is None:
+        flash('This task was deleted while you were editing it.', 'warning')
+        return redirect(url_for('main.tasks'))
     
-    return render_template('task_form.html', task=None, title="New Task")
+    current = {
+        'title': task.title,
+        'description': task.description,
+        'due_date': task.due_date.date(),
+        'status': task.status,
+        'remarks': task.remarks,
+    }
+    conflicts = {name: value for name, value in current.items() if (form[name].data or None) != (value or None)}
+    form.version.data = str(task.version)
+    flash(f'{task.last_updated_by_name or "Someone"} changed this task while you were editing it. '
+          'Review the current values and save again to keep your changes.', 'warning')
+    return render_template('task_form.html', form=form, task=task, title="Edit Task", conflicts=conflicts), 409
 
-@app.route('/tasks/<int:task_id>/edit', methods=['GET', 'POST'])
+@main.route('/tasks/<int:task_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_task(task_id):
     task = Task.query.get_or_404(task_id)
+    form = TaskForm(obj=task)
     
-    if request.method == 'POST':
-        task.title = request.form['title']
-        task.description = request.form['description']
-        task.due_date = datetime.strptime(request.form['due_date'], '%Y-%m-%d')
-        task.status = request.form['status']
-        task.remarks = request.form['remarks']
+    if form.validate_on_submit():
+        # No lock is held while the form is open: the version it was rendered
+        # from is compared here, and again by the UPDATE itself
+        if form.version.data and form.version.data != str(task.version):
+            return _edit_conflict(form, task_id)
+        
+        task.title = form.title.data
+        task.description = form.description.data
+        task.due_date = _due_datetime(form.due_date.data)
+        task.status = form.status.data
+        task.remarks = form.remarks.data
         task.last_updated_by_id = current_user.id
         task.last_updated_by_name = current_user.username
         
-        db.session.commit()
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            return _edit_conflict(form, task_id)
         flash('Task updated successfully!', 'success')
-        return redirect(url_for('tasks'))
+        return redirect(url_for('main.tasks'))
     
-    return render_template('task_form.html', task=task, title="Edit Task")
+    return render_template('task_form.html', form=form, task=task, title="Edit Task")
 
-@app.route('/tasks/<int:task_id>/delete', methods=['POST'])
+@main.route('/tasks/<int:task_id>/delete', methods=['POST'])
 @login_required
 def delete_task(task_id):
     task = Task.query.get_or_404(task_id)
     db.session.delete(task)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        flash('The task was changed or deleted by someone else; it was not deleted.', 'warning')
+        return redirect(url_for('main.tasks'))
     
     flash('Task deleted successfully!', 'success')
-    return redirect(url_for('tasks'))
+    return redirect(url_for('main.tasks'))
 
-@app.route('/api/tasks/<int:task_id>', methods=['GET'])
+def _task_page():
+    filters = TaskFilters.from_args(request.args)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+    
+    today = datetime.now().date()
+    ids = list_task_ids(filters, today)
+    tasks = load_tasks(ids[offset:offset + limit])
+    
+    return jsonify({
+        'total': len(ids),
+        'offset': offset,
+        'items': [dict(task.to_dict(), archived=isinstance(task, ArchivedTask)) for task in tasks]
+    })
+
+@main.route('/api/tasks', methods=['GET'])
+@login_required
+def list_tasks():
+    return _task_page()
+
+@main.app_errorhandler(HTTPException)
+def json_api_error(e):
+    # Scripts and the virtual list read JSON; keep the status and headers
+    # (Retry-After of a 429 or 503) and only replace the HTML body
+    if not request.path.startswith('/api/'):
+        return e
+    response = e.get_response()
+    response.set_data(json.dumps({'success': False, 'message': e.description}))
+    response.mimetype = 'application/json'
+    return response
+
+def _task_response(task, body=None, status=200):
+    # The version doubles as the entity tag, for If-None-Match and If-Match
+    response = jsonify(body if body is not None else task.to_dict())
+    response.status_code = status
+    response.set_etag(str(task.version))
+    return response
+
+def _task_conflict(task, status=409):
+    body = {'success': False, 'message': 'Task was changed by someone else', 'task': task.to_dict()}
+    return _task_response(task, body, status)
+
+@main.route('/api/tasks/<int:task_id>', methods=['GET'])
 @login_required
 def get_task(task_id):
-    task = Task.query.get_or_404(task_id)
-    return jsonify(task.to_dict())
+    task = find_task(task_id, TaskFilters.from_args(request.args).include_archived)
+    if task is None:
+        abort(404)
+    return _task_response(task).make_conditional(request)
 
-@app.route('/api/tasks/<int:task_id>/status', methods=['POST'])
+@main.route('/api/tasks/<int:task_id>/history', methods=['GET'])
+@login_required
+def get_task_history(task_id):
+    events = task_history(task_id)
+    if not events:
+        abort(404)
+    return jsonify([event.to_dict() for event in events])
+
+@main.route('/api/tasks/<int:task_id>/status', methods=['POST'])
 @login_required
 def update_task_status(task_id):
     task = Task.query.get_or_404(task_id)
     data = request.get_json()
     
     if 'status' in data:
+        # The expected version comes from If-Match or the request body;
+        # without either the update is unconditional
+        if request.if_match and not request.if_match.contains_weak(str(task.version)):
+            return _task_conflict(task, 412)
+        if data.get('version') is not None:
+            try:
+                version = int(data['version'])
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'message': 'Version must be an integer'}), 400
+            if version != task.version:
+                return _task_conflict(task)
+        
         task.status = data['status']
         task.last_updated_by_id = current_user.id
         task.last_updated_by_name = current_user.username
-        db.session.commit()
-        return jsonify({'success': True, 'task': task.to_dict()})
+        try:
+            db.session.commit()
+        except StaleDataError:
+            db.session.rollback()
+            task = db.session.get(Task, task_id)
+            if task is None:
+                abort(404)
+            return _task_conflict(task)
+        return _task_response(task, {'success': True, 'task': task.to_dict()})
     
-    return jsonify({'success': False, 'message': 'Status not provided'}), 400
\ No newline at end of file
+    return jsonify({'success': False, 'message': 'Status not provided'}), 400
+
+@main.route('/api/metrics', methods=['GET'])
+@login_required
+def get_metrics():
+    routes = metrics.snapshot()
+    for counters in routes.values():
+        if counters.get('compression_bytes_in'):
+            counters['compression_ratio'] = round(counters['compression_bytes_out'] / counters['compression_bytes_in'], 3)
+    latency = db_latency.current()
+    admission = {
+        'db_latency_ms': round(latency * 1000, 3) if latency is not None else None,
+        'shed_threshold_ms': app.config['SHED_DB_LATENCY_MS'],
+    }
+    return jsonify({'routes': routes, 'task_cache': task_cache.stats(), 'admission': admission})
+
+# Token API: no cookie session, no User row, just the cached token lookup
+def token_required(view):
+    @wraps(view)
+    def decorated_view(*args, **kwargs):
+        if not isinstance(current_user._get_current_object(), TokenUser):
+            response = jsonify({'success': False, 'message': 'A valid bearer token is required'})
+            response.status_code = 401
+            response.headers['WWW-Authenticate'] = 'Bearer'
+            return response
+        return view(*args, **kwargs)
+    return decorated_view
+
+@api.route('/tasks', methods=['GET'])
+@token_required
+def api_list_tasks():
+    return _task_page()
+
+@api.route('/tasks/<int:task_id>', methods=['GET'])
+@token_required
+def api_get_task(task_id):
+    task = find_task(task_id, TaskFilters.from_args(request.args).include_archived)
+    if task is None:
+        abort(404)
+    return _task_response(task).make_conditional(request)
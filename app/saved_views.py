@@ -0,0 +1,151 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+
+from sqlalchemy import bindparam, delete, event, func, insert, or_, select, update
+
+# Saved view filters matched per statement; each one is a column
+MATCH_BATCH_SIZE = 200
+
+
+def dump_filters(filters):
+    """Serialize TaskFilters for a saved view; saved views only cover live tasks"""
+    return json.dumps(filters._replace(include_archived=False)._asdict(), separators=(',', ':'))
+
+
+@lru_cache(maxsize=1024)
+def load_filters(data):
+    from app.repository import TaskFilters
+
+    return TaskFilters(**json.loads(data))
+
+
+def refresh_view(session, view, today):
+    """Recompute the members and count of a saved view with the list query"""
+    from app.models import SavedViewTask
+    from app.repository import DATE_FILTERS, ids_statement
+
+    filters = load_filters(view.filters)
+    ids = list(session.scalars(ids_statement(filters), filters.params(today)))
+    session.execute(delete(SavedViewTask).where(SavedViewTask.view_id == view.id))
+    if ids:
+        session.execute(insert(SavedViewTask), [{'view_id': view.id, 'task_id': task_id} for task_id in ids])
+    view.match_count = len(ids)
+    view.refreshed_for = today if filters.filter_type in DATE_FILTERS else None
+
+
+def user_views(user_id):
+    """Saved views of a user for the sidebar, with their counts"""
+    from app.models import SavedView
+
+    return SavedView.query.filter_by(user_id=user_id).order_by(SavedView.name).all()
+
+
+def delete_view(session, view):
+    from app.models import SavedViewTask
+
+    session.execute(delete(SavedViewTask).where(SavedViewTask.view_id == view.id))
+    session.delete(view)
+
+
+def forget_tasks(session, task_ids):
+    """Take tasks moved out of the task table by core statements, such as
+    the archive job, out of every saved view"""
+    from app.models import SavedView, SavedViewTask
+
+    counts = session.execute(
+        select(SavedViewTask.view_id, func.count())
+        .where(SavedViewTask.task_id.in_(task_ids))
+        .group_by(SavedViewTask.view_id)
+    ).all()
+    for view_id, count in counts:
+        session.execute(update(SavedView).where(SavedView.id == view_id)
+                        .values(match_count=SavedView.match_count - count))
+    session.execute(delete(SavedViewTask).where(SavedViewTask.task_id.in_(task_ids)))
+
+
+def refresh_saved_views():
+    """Scheduler job: recompute the date based saved views for today"""
+    from app import db
+    from app.models import SavedView
+
+    today = datetime.now().date()
+    refreshed = 0
+    stale = select(SavedView.id).where(SavedView.refreshed_for != today)
+    for view_id in db.session.scalars(stale).all():
+        # One short transaction per view
+        view = db.session.get(SavedView, view_id)
+        if view is not None:
+            refresh_view(db.session, view, today)
+            db.session.commit()
+            refreshed += 1
+    return {'refreshed': refreshed}
+
+
+def _membership_changes(connection, task_ids, today):
+    from app.models import SavedView, SavedViewTask
+    from app.repository import matching_statement
+
+    # Stale views are recomputed as a whole when next refreshed
+    views = connection.execute(
+        select(SavedView.id, SavedView.filters)
+        .where(or_(SavedView.refreshed_for == today, SavedView.refreshed_for.is_(None)))
+    ).all()
+    if not views:
+        return {}, {}
+    members = set(connection.execute(
+        select(SavedViewTask.view_id, SavedViewTask.task_id).where(SavedViewTask.task_id.in_(task_ids))
+    ).all())
+
+    # The written tasks are matched with the list query's criteria, so
+    # membership agrees exactly with a full refresh. Every distinct filter is
+    # a column of one statement, however many views and users share it.
+    filters = list(dict.fromkeys(data for _, data in views))
+    matches = {}
+    for start in range(0, len(filters), MATCH_BATCH_SIZE):
+        batch = filters[start:start + MATCH_BATCH_SIZE]
+        stmt = matching_statement([load_filters(data) for data in batch], today)
+        for row in connection.execute(stmt, {'ids': task_ids}):
+            matches.update(((data, row[0]), bool(match)) for data, match in zip(batch, row[1:]))
+
+    added, removed = defaultdict(list), defaultdict(list)
+    for view_id, data in views:
+        for task_id in task_ids:
+            member = (view_id, task_id) in members
+            if matches.get((data, task_id), False) != member:
+                (removed if member else added)[view_id].append(task_id)
+    return added, removed
+
+
+def init_app(app, db):
+    """Keep saved view memberships current with task writes"""
+    from app.models import SavedView, SavedViewTask, Task
+
+    # Only the tasks written in this flush are matched against the views, and
+    # the changes are written inside the flush, so they commit or roll back
+    # with the task change itself. Deleted tasks no longer match anything.
+    @event.listens_for(db.session, 'after_flush')
+    def _update_saved_views(session, flush_context):
+        task_ids = [task.id for task in session.new | session.dirty | session.deleted if isinstance(task, Task)]
+        if not task_ids:
+            return
+
+        connection = session.connection()
+        added, removed = _membership_changes(connection, task_ids, datetime.now().date())
+        # A fixed number of statements, however many views changed
+        rows = [{'v': view_id, 't': task_id} for view_id, task_ids in removed.items() for task_id in task_ids]
+        if rows:
+            connection.execute(delete(SavedViewTask).where(SavedViewTask.view_id == bindparam('v'),
+                                                           SavedViewTask.task_id == bindparam('t')), rows)
+        rows = [{'view_id': view_id, 'task_id': task_id} for view_id, task_ids in added.items() for task_id in task_ids]
+        if rows:
+            connection.execute(insert(SavedViewTask), rows)
+        deltas = defaultdict(list)
+        for view_id in added.keys() | removed.keys():
+            delta = len(added.get(view_id, ())) - len(removed.get(view_id, ()))
+            if delta:
+                deltas[delta].append(view_id)
+        for delta, view_ids in deltas.items():
+            connection.execute(update(SavedView).where(SavedView.id.in_(view_ids))
+                               .values(match_count=SavedView.match_count + delta))
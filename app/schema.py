@@ -0,0 +1,40 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateColumn
+
+
+def missing_columns(engine, metadata):
+    """Columns of the models that existing tables lack, by table name.
+
+    ``create_all`` creates missing tables but never alters existing ones, so
+    databases created by older versions keep their old columns.
+    """
+    inspector = inspect(engine)
+    existing = set(inspector.get_table_names())
+    missing = {}
+    for table in metadata.sorted_tables:
+        if table.name not in existing:
+            continue
+        names = {column['name'] for column in inspector.get_columns(table.name)}
+        columns = [column for column in table.columns if column.name not in names]
+        if columns:
+            missing[table.name] = columns
+    return missing
+
+
+def add_column_statements(engine, missing):
+    """ALTER TABLE statements adding ``missing`` columns, in the engine's dialect"""
+    return [f'ALTER TABLE {table} ADD COLUMN {CreateColumn(column).compile(dialect=engine.dialect)}'
+            for table, columns in missing.items() for column in columns]
+
+
+def check_columns(app, db):
+    """Refuse to start on tables that lack columns the models query, such as
+    the task version of optimistic concurrency; every query of such a table
+    would fail"""
+    if not app.config.get('SCHEMA_CHECK', True):
+        return
+    missing = missing_columns(db.engine, db.metadata)
+    if missing:
+        statements = ';\n'.join(add_column_statements(db.engine, missing))
+        raise RuntimeError(f'The database was created by an older version and lacks columns; add them with:\n'
+                           f'{statements};')
@@ -0,0 +1,135 @@
+import threading
+
+from sqlalchemy import event
+
+# Statements that do not write; anything else, including a CTE, counts as a write
+READ_STATEMENTS = ('SELECT', 'PRAGMA', 'BEGIN', 'COMMIT', 'ROLLBACK', 'RELEASE')
+
+
+class WriteLock:
+    """Serializes write transactions of one process on one database file.
+
+    Writers wait here, in order of arrival, instead of all spinning in
+    SQLite's busy handler; only one connection per process competes with
+    other processes for the database write lock.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # On timeout carry on and let SQLite's busy timeout decide; a thread
+        # that already holds the lock on another connection must not deadlock
+        return self._lock.acquire(timeout=self.timeout)
+
+    def release(self):
+        self._lock.release()
+
+
+def _writes(statement):
+    return not statement.lstrip().upper().startswith(READ_STATEMENTS)
+
+
+def configure_engine(engine, journal_mode='', synchronous='', busy_timeout_ms=5000, mmap_size=0,
+                     immediate_writes=False):
+    """Apply connection pragmas, and optionally BEGIN IMMEDIATE for writes, to a SQLite engine"""
+    write_lock = WriteLock(busy_timeout_ms / 1000) if immediate_writes else None
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        if immediate_writes:
+            # Let SQLAlchemy's begin event issue BEGIN instead of pysqlite
+            dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {int(busy_timeout_ms)}')
+        if journal_mode:
+            cursor.execute(f'PRAGMA journal_mode = {journal_mode}')
+        if synchronous:
+            cursor.execute(f'PRAGMA synchronous = {synchronous}')
+        if mmap_size:
+            cursor.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+        cursor.close()
+
+    if not immediate_writes:
+        return
+
+    @event.listens_for(engine, 'begin')
+    def _begin(conn):
+        if conn.get_execution_options().get('isolation_level') == 'AUTOCOMMIT':
+            return
+        # Transactions that only read never take a lock
+        conn.exec_driver_sql('BEGIN')
+        conn.info['deferred'] = True
+
+    # At the first write, such as the first flush of the session, the reads
+    # so far are committed and the transaction starts over with BEGIN
+    # IMMEDIATE. Upgrading the deferred transaction in place would fail with
+    # "database is locked" right away, without waiting for the busy timeout,
+    # whenever another process wrote since it began. Rows read before are
+    # protected as on other databases at READ COMMITTED: edits of tasks check
+    # the version they loaded.
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _upgrade(conn, cursor, statement, parameters, context, executemany):
+        if not conn.info.get('deferred') or not _writes(statement):
+            return
+        del conn.info['deferred']
+        conn.info['write_lock'] = write_lock.acquire()
+        driver_connection = conn.connection.driver_connection
+        driver_connection.execute('COMMIT')
+        driver_connection.execute('BEGIN IMMEDIATE')
+
+    def _release(info):
+        info.pop('deferred', None)
+        if info.pop('write_lock', False):
+            write_lock.release()
+
+    @event.listens_for(engine, 'commit')
+    def _commit(conn):
+        _release(conn.info)
+
+    @event.listens_for(engine, 'rollback')
+    def _rollback(conn):
+        _release(conn.info)
+
+    @event.listens_for(engine, 'reset')
+    def _reset(dbapi_connection, connection_record, reset_state):
+        _release(connection_record.info)
+
+
+def init_app(app, db):
+    """Tune every SQLite engine of the app from the SQLITE_* settings"""
+    with app.app_context():
+        engines = [engine for engine in db.engines.values() if engine.dialect.name == 'sqlite']
+    for engine in engines:
+        configure_engine(
+            engine,
+            journal_mode=app.config.get('SQLITE_JOURNAL_MODE', ''),
+            synchronous=app.config.get('SQLITE_SYNCHRONOUS', ''),
+            busy_timeout_ms=app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000),
+            mmap_size=app.config.get('SQLITE_MMAP_SIZE', 0),
+            immediate_writes=app.config.get('SQLITE_IMMEDIATE_WRITES', False),
+        )
+
+
+def reuses_ids(engine, table):
+    """Whether a SQLite table hands out the id of its newest row again once
+    that row is deleted, i.e. was created without AUTOINCREMENT"""
+    with engine.connect() as conn:
+        sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+                                   (table,)).scalar()
+    return sql is not None and 'AUTOINCREMENT' not in sql.upper()
+
+
+def check_task_ids(app, db):
+    """Refuse to start on a task table that reuses ids.
+
+    ``create_all`` never alters existing tables, so databases created before
+    task ids were made permanent keep reusing them: the next archive run of a
+    reused id fails on archived_task and histories of two tasks get merged.
+    """
+    if not app.config.get('SCHEMA_CHECK', True) or db.engine.dialect.name != 'sqlite':
+        return
+    if reuses_ids(db.engine, 'task'):
+        raise RuntimeError('The task table was created without AUTOINCREMENT and reuses task ids; '
+                           'run python migrate_task_ids.py once to rebuild it')
@@ -33,17 +33,34 @@ document.addEventListener('DOMContentLoaded', function() {
         dropdown.addEventListener('change', function() {
             const taskId = this.getAttribute('data-task-id');
             const newStatus = this.value;
+            const headers = {
+                'Content-Type': 'application/json',
+            };
+            // Only apply the change to the version of the task shown on the page
+            if (this.dataset.version) {
+                headers['If-Match'] = `"${this.dataset.version}"`;
+            }
             
             // Update task status via API
             fetch(`/api/tasks/${taskId}/status`, {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
+                headers: headers,
                 body: JSON.stringify({ status: newStatus }),
             })
             .then(response => response.json())
             .then(data => {
+                if (data.task) {
+                    this.dataset.version = data.task.version;
+                }
+                if (!data.success && data.task) {
+                    // Someone else changed the task first: show their status
+                    this.value = data.task.status;
+                    const toast = createToast('Task changed', 'This task was changed by someone else. Review it and try again.', 'warning');
+                    document.body.appendChild(toast);
+                    setTimeout(() => {
+                        toast.classList.add('show');
+                    }, 100);
+                }
                 if (data.success) {
                     // Show success message
                     const toast = createToast('Status updated', 'Task status has been updated successfully.', 'success');
@@ -83,6 +100,241 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
     
+    // Virtualized task list: rows are fetched page by page from the JSON API
+    // and only the rows inside the viewport are kept in the DOM
+    const virtualList = document.getElementById('virtualTaskList');
+    
+    if (virtualList) {
+        const endpoint = virtualList.dataset.endpoint;
+        const editUrl = virtualList.dataset.editUrl;
+        const pageSize = parseInt(virtualList.dataset.pageSize, 10);
+        const rowHeight = parseInt(virtualList.dataset.rowHeight, 10);
+        const overscan = 10;
+        const spacer = virtualList.querySelector('.virtual-spacer');
+        const rows = virtualList.querySelector('.virtual-rows');
+        const taskCount = document.getElementById('taskCount');
+        const listTitle = document.getElementById('taskListTitle');
+        const sortSelect = document.getElementById('sortSelect');
+        const searchForm = document.getElementById('searchForm');
+        const mobileSearch = document.getElementById('mobileSearch');
+        const searchInputs = [searchForm && searchForm.querySelector('input[name="search"]'), mobileSearch].filter(Boolean);
+        
+        let params = new URLSearchParams(window.location.search);
+        let total = 0;
+        let pages = new Map();
+        let loading = new Set();
+        let generation = 0;
+        let renderQueued = false;
+        
+        const fetchPage = function(index) {
+            if (pages.has(index) || loading.has(index)) {
+                return;
+            }
+            loading.add(index);
+            const requestGeneration = generation;
+            const query = new URLSearchParams(params);
+            query.delete('view');
+            query.delete('page');
+            query.set('offset', index * pageSize);
+            query.set('limit', pageSize);
+            
+            fetch(`${endpoint}?${query}`, { headers: { 'Accept': 'application/json' } })
+            .then(response => {
+                if (!response.ok) {
+                    const error = new Error(`HTTP ${response.status}`);
+                    // Rate limited or shed: worth another try once allowed
+                    if (response.status === 429 || response.status === 503) {
+                        error.retryAfter = Number(response.headers.get('Retry-After')) || 5;
+                    }
+                    throw error;
+                }
+                return response.json();
+            })
+            .then(data => {
+                // Ignore answers to a filter that is no longer shown
+                if (requestGeneration !== generation) {
+                    return;
+                }
+                loading.delete(index);
+                pages.set(index, data.items);
+                total = data.total;
+                taskCount.textContent = total;
+                spacer.style.height = `${total * rowHeight}px`;
+                scheduleRender();
+            })
+            .catch(error => {
+                console.error('Error loading tasks:', error);
+                if (!error.retryAfter) {
+                    loading.delete(index);
+                    return;
+                }
+                // The rows stay placeholders until the retry, which is
+                // dropped if the list shows other filters by then
+                window.setTimeout(() => {
+                    if (requestGeneration === generation) {
+                        loading.delete(index);
+                        scheduleRender();
+                    }
+                }, error.retryAfter * 1000);
+            });
+        };
+        
+        const renderRow = function(task) {
+            if (!task) {
+                return `<div class="virtual-row placeholder" style="height: ${rowHeight}px"><div class="task-main"><div class="task-title"></div></div></div>`;
+            }
+            const overdue = !task.archived && task.status !== 'completed' && new Date(`${task.due_date}T00:00:00`) < new Date(new Date().toDateString());
+            const statusLabel = task.status.replace('-', ' ').replace(/\b\w/g, l => l.toUpperCase());
+            const actions = task.archived
+                ? '<span class="badge bg-light text-muted">Archived</span>'
+                : `<a href="${editUrl.replace('/0/', `/${task.id}/`)}" class="btn btn-sm btn-outline-secondary"><i class="fa-solid fa-pen"></i></a>`;
+            return `
+                <div class="virtual-row" style="height: ${rowHeight}px">
+                    <div class="task-main">
+                        <div class="task-title">${escapeHtml(task.title)}</div>
+                        <div class="description">${escapeHtml(task.description || '')}</div>
+                    </div>
+                    <span class="status-badge ${escapeHtml(task.status)}">
+                        <span class="status-dot ${escapeHtml(task.status)} me-1"></span>${escapeHtml(statusLabel)}
+                    </span>
+                    <small class="text-nowrap ${overdue ? 'text-danger' : 'text-muted'}">
+                        <i class="fa-solid fa-calendar me-1"></i>${escapeHtml(task.due_date)}
+                    </small>
+                    ${actions}
+                </div>
+            `;
+        };
+        
+        const render = function() {
+            renderQueued = false;
+            const first = Math.max(0, Math.floor(virtualList.scrollTop / rowHeight) - overscan);
+            const last = Math.min(total, Math.ceil((virtualList.scrollTop + virtualList.clientHeight) / rowHeight) + overscan);
+            const html = [];
+            
+            for (let i = first; i < last; i++) {
+                const page = pages.get(Math.floor(i / pageSize));
+                if (!page) {
+                    fetchPage(Math.floor(i / pageSize));
+                }
+                html.push(renderRow(page ? page[i % pageSize] : null));
+            }
+            
+            rows.style.transform = `translateY(${first * rowHeight}px)`;
+            rows.innerHTML = html.join('');
+        };
+        
+        const scheduleRender = function() {
+            if (!renderQueued) {
+                renderQueued = true;
+                window.requestAnimationFrame(render);
+            }
+        };
+        
+        const listTitleFor = function(query) {
+            const filters = { today: 'Due Today', upcoming: 'Upcoming Tasks', overdue: 'Overdue Tasks' };
+            if (filters[query.get('filter')]) {
+                return filters[query.get('filter')];
+            }
+            if (query.get('status')) {
+                return query.get('status').replace('-', ' ').replace(/\b\w/g, l => l.toUpperCase()) + ' Tasks';
+            }
+            return 'All Tasks';
+        };
+        
+        const reload = function(newParams) {
+            params = newParams;
+            generation += 1;
+            pages = new Map();
+            loading = new Set();
+            total = 0;
+            taskCount.innerHTML = '&hellip;';
+            listTitle.textContent = listTitleFor(params);
+            virtualList.scrollTop = 0;
+            spacer.style.height = '0px';
+            rows.innerHTML = '';
+            if (sortSelect && params.get('sort_by')) {
+                sortSelect.value = params.get('sort_by');
+            }
+            searchInputs.forEach(input => {
+                input.value = params.get('search') || '';
+            });
+            fetchPage(0);
+        };
+        
+        const navigate = function(url) {
+            url.searchParams.set('view', 'virtual');
+            window.history.pushState(null, '', url);
+            reload(url.searchParams);
+        };
+        
+        // Filter, status and archive links update the list in place; saved
+        // views are served by their own page
+        document.querySelectorAll('.sidebar-link:not(.saved-view-link), .task-list-link').forEach(link => {
+            link.addEventListener('click', function(e) {
+                e.preventDefault();
+                document.querySelectorAll('.sidebar-link.active').forEach(active => active.classList.remove('active'));
+                if (this.classList.contains('sidebar-link')) {
+                    this.classList.add('active');
+                }
+                navigate(new URL(this.href, window.location.href));
+            });
+        });
+        
+        if (sortSelect) {
+            sortSelect.addEventListener('change', function() {
+                const url = new URL(window.location.href);
+                const sameColumn = url.searchParams.get('sort_by') === this.value;
+                url.searchParams.set('sort_by', this.value);
+                url.searchParams.set('sort_order', sameColumn && url.searchParams.get('sort_order') !== 'desc' ? 'desc' : 'asc');
+                navigate(url);
+            });
+        }
+        
+        // Searches start a new list like the search form does, without a reload
+        const search = function(text) {
+            const url = new URL(searchForm ? searchForm.action : window.location.pathname, window.location.href);
+            url.search = '';
+            if (text.trim()) {
+                url.searchParams.set('search', text.trim());
+            }
+            document.querySelectorAll('.sidebar-link.active').forEach(active => active.classList.remove('active'));
+            navigate(url);
+        };
+        
+        if (searchForm) {
+            searchForm.addEventListener('submit', function(e) {
+                e.preventDefault();
+                search(this.querySelector('input[name="search"]').value);
+            });
+        }
+        
+        if (mobileSearch) {
+            mobileSearch.addEventListener('keypress', function(e) {
+                if (e.key === 'Enter') {
+                    search(this.value);
+                }
+            });
+        }
+        
+        virtualList.addEventListener('scroll', scheduleRender);
+        window.addEventListener('resize', scheduleRender);
+        window.addEventListener('popstate', function() {
+            reload(new URLSearchParams(window.location.search));
+        });
+        
+        fetchPage(0);
+    }
+    
+    // Escape text before inserting it into HTML
+    function escapeHtml(text) {
+        return String(text)
+            .replace(/&/g, '&amp;')
+            .replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;')
+            .replace(/"/g, '&quot;')
+            .replace(/'/g, '&#39;');
+    }
+    
     // Helper function to create toast notifications
     function createToast(title, message, type = 'primary') {
         const toast = document.createElement('div');
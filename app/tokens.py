@@ -0,0 +1,171 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import request
+from flask.sessions import SecureCookieSessionInterface
+from flask_login import UserMixin
+from sqlalchemy import select
+
+# Prefix of issued tokens, so they are easy to recognise in logs and scanners
+TOKEN_PREFIX = 'tm_'
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def bearer_token(request):
+    """The token of an 'Authorization: Bearer' header, or None"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+
+class TokenUser(UserMixin):
+    """The user behind an API token, without loading the User row"""
+
+    def __init__(self, id, username, token_id):
+        self.id = id
+        self.username = username
+        self.token_id = token_id
+
+    def __repr__(self):
+        return f'<TokenUser {self.username}>'
+
+
+class TokenCache:
+    """Bounded LRU of verified token hashes.
+
+    Entries expire after ``ttl`` seconds, which bounds how long another
+    worker keeps accepting a revoked token.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash, now):
+        """Returns (found, user); user is None for a token known to be invalid"""
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None or entry[1] <= now:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, token_hash, user, now):
+        with self._lock:
+            self._entries[token_hash] = (user, now + self.ttl)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, token_hash):
+        with self._lock:
+            self._entries.pop(token_hash, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+token_cache = TokenCache()
+
+# Unknown tokens, apart from the valid ones so a client cycling through bad
+# tokens cannot evict them; a client retrying one bad token costs no query
+rejected_tokens = TokenCache(ttl=10, max_entries=1000)
+
+
+def issue_token(session, user, name):
+    """Create a token for ``user``; the plain token is only available here"""
+    from app.models import ApiToken
+
+    token = TOKEN_PREFIX + secrets.token_urlsafe(32)
+    record = ApiToken(user=user, name=name, token_hash=hash_token(token))
+    session.add(record)
+    session.flush()
+    return token, record
+
+
+def revoke_token(session, record):
+    record.revoked_on = datetime.utcnow()
+    token_cache.discard(record.token_hash)
+
+
+def verify_token(session, token, primary=None):
+    """The TokenUser for a valid token, or None"""
+    from app.models import ApiToken, User
+
+    # Anything not issued here is rejected without a lookup
+    if not token.startswith(TOKEN_PREFIX):
+        return None
+    token_hash = hash_token(token)
+    now = time.monotonic()
+    found, user = token_cache.get(token_hash, now)
+    if found:
+        return user
+    found, _ = rejected_tokens.get(token_hash, now)
+    if found:
+        return None
+    # Always ask the primary: a replica that has not seen a new token yet
+    # would get it cached as invalid
+    row = session.execute(
+        select(ApiToken.id, User.id, User.username)
+        .join(User, ApiToken.user_id == User.id)
+        .where(ApiToken.token_hash == token_hash, ApiToken.revoked_on.is_(None)),
+        bind_arguments={'bind': primary},
+    ).first()
+    if row is None:
+        rejected_tokens.put(token_hash, None, now)
+        return None
+    user = TokenUser(row[1], row[2], row[0])
+    token_cache.put(token_hash, user, now)
+    return user
+
+
+class TokenSessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions, except for bearer token requests.
+
+    Token requests get a fresh, throwaway session: the cookie is neither
+    decoded nor written back, so a token client cannot ride on a browser
+    session and never receives one.
+    """
+
+    def open_session(self, app, request):
+        if bearer_token(request) is not None:
+            return self.session_class()
+        return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        if bearer_token(request) is not None:
+            return
+        super().save_session(app, session, response)
+
+
+def init_app(app, db, login_manager):
+    """Authenticate 'Authorization: Bearer' requests with API tokens"""
+    token_cache.ttl = app.config.get('API_TOKEN_CACHE_SECONDS', 60)
+    app.session_interface = TokenSessionInterface()
+
+    # Tokens only grant the read API; elsewhere a bearer request is anonymous
+    @login_manager.request_loader
+    def _load_token_user(request):
+        token = bearer_token(request)
+        if token is None or request.blueprint != 'api':
+            return None
+        return verify_token(db.session, token, db.engine)
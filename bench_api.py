@@ -0,0 +1,56 @@
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+# Benchmark against a throwaway in-memory database, never the real one
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['TASKMASTER_PROFILE'] = 'default'
+os.environ['RATELIMIT_ENABLED'] = '0'
+os.environ['JOBS_ENABLED'] = '0'
+
+from app import app, db
+from app.models import Task, User
+from app.tokens import issue_token
+
+# Requests per second of the JSON read API through the WSGI stack: a logged
+# in browser session (cookie decoding, Flask-Login's user query, cookie
+# refresh) against a bearer token (cached verification, no session).
+parser = argparse.ArgumentParser(description='API authentication benchmark')
+parser.add_argument('--tasks', type=int, default=200, help='rows in the task table')
+parser.add_argument('--requests', type=int, default=2000, help='requests per measurement')
+args = parser.parse_args()
+
+app.config['WTF_CSRF_ENABLED'] = False
+
+def measure(client, path, headers=None):
+    assert client.get(path, headers=headers).status_code == 200
+    began = time.perf_counter()
+    for _ in range(args.requests):
+        client.get(path, headers=headers)
+    return args.requests / (time.perf_counter() - began)
+
+with app.app_context():
+    user = User(username='bench')
+    user.set_password('bench')
+    db.session.add(user)
+    now = datetime.now()
+    db.session.add_all(Task(title=f'Task {i}', description='benchmark', due_date=now + timedelta(days=i % 21 - 10),
+                            status='not-started') for i in range(args.tasks))
+    token, _ = issue_token(db.session, user, 'bench')
+    db.session.commit()
+
+cookie_client = app.test_client()
+cookie_client.post('/login', data={'username': 'bench', 'password': 'bench'})
+token_client = app.test_client()
+bearer = {'Authorization': f'Bearer {token}'}
+
+cases = {
+    'single task': ('/api/tasks/1', '/api/v1/tasks/1'),
+    'task list (limit 20)': ('/api/tasks?limit=20', '/api/v1/tasks?limit=20'),
+}
+print(f"{'request':<24} {'cookie':>12} {'token':>12} {'speedup':>7}")
+for name, (cookie_path, token_path) in cases.items():
+    cookie_rate = measure(cookie_client, cookie_path)
+    token_rate = measure(token_client, token_path, bearer)
+    print(f'{name:<24} {cookie_rate:10.0f}/s {token_rate:10.0f}/s {token_rate / cookie_rate:6.2f}x')
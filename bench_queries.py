@@ -0,0 +1,81 @@
+import argparse
+import os
+import timeit
+from datetime import datetime, timedelta
+
+# Benchmark against a throwaway in-memory database, never the real one
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['TASKMASTER_PROFILE'] = 'default'
+
+from app import app, db
+from app.models import Task
+from app.repository import SORT_COLUMNS, TaskFilters, ids_statement, _bucket_counts
+
+# Per-request Python overhead of the task list queries: the old Task.query
+# chains (built and cache-keyed on every call) against the repository's
+# prebuilt statements. The result cache is bypassed, so every call builds,
+# compiles and runs its query; with a small --tasks the timings show the
+# construction overhead alone, with the default the cost of the whole query.
+parser = argparse.ArgumentParser(description='Query layer microbenchmark')
+parser.add_argument('--tasks', type=int, default=10000, help='rows in the task table')
+parser.add_argument('--number', type=int, default=50, help='calls per measurement')
+args = parser.parse_args()
+
+def legacy_ids(filters, today):
+    query = Task.query
+    if filters.filter_type == 'today':
+        query = query.filter(Task.due_date >= today, Task.due_date < today + timedelta(days=1))
+    elif filters.filter_type == 'upcoming':
+        query = query.filter(Task.due_date >= today, Task.due_date <= today + timedelta(days=7), Task.status != 'completed')
+    elif filters.filter_type == 'overdue':
+        query = query.filter(Task.due_date < today, Task.status != 'completed')
+    if filters.status:
+        query = query.filter(Task.status == filters.status)
+    if filters.search:
+        search = f"%{filters.search}%"
+        query = query.filter(Task.title.like(search) | Task.description.like(search) | Task.remarks.like(search))
+    column = getattr(Task, SORT_COLUMNS[filters.sort_by])
+    query = query.order_by(column.desc() if filters.sort_order == 'desc' else column.asc(), Task.id)
+    return [task_id for task_id, in query.with_entities(Task.id)]
+
+def legacy_counts(today):
+    tomorrow = today + timedelta(days=1)
+    return {
+        'all': Task.query.count(),
+        'today': Task.query.filter(Task.due_date >= today, Task.due_date < tomorrow).count(),
+        'upcoming': Task.query.filter(Task.due_date >= today, Task.due_date <= today + timedelta(days=7), Task.status != 'completed').count(),
+        'overdue': Task.query.filter(Task.due_date < today, Task.status != 'completed').count(),
+        'not_started': Task.query.filter(Task.status == 'not-started').count(),
+        'in_progress': Task.query.filter(Task.status == 'in-progress').count(),
+        'completed': Task.query.filter(Task.status == 'completed').count(),
+    }
+
+def repository_ids(filters, today):
+    return list(db.session.scalars(ids_statement(filters), filters.params(today)))
+
+def report(name, legacy, repository):
+    legacy_time = min(timeit.repeat(legacy, number=args.number, repeat=3)) / args.number
+    repository_time = min(timeit.repeat(repository, number=args.number, repeat=3)) / args.number
+    print(f'{name:<28} {legacy_time * 1e6:9.1f} us {repository_time * 1e6:9.1f} us {legacy_time / repository_time:6.1f}x')
+
+with app.app_context():
+    now = datetime.now()
+    statuses = ('not-started', 'in-progress', 'completed')
+    db.session.add_all(Task(title=f'Task {i}', description='benchmark', due_date=now + timedelta(days=i % 21 - 10),
+                            status=statuses[i % 3]) for i in range(args.tasks))
+    db.session.commit()
+    today = now.date()
+
+    cases = {
+        'list (all, by due date)': TaskFilters(),
+        'list (overdue, desc)': TaskFilters(filter_type='overdue', sort_order='desc'),
+        'list (status + search)': TaskFilters(status='in-progress', search='Task 1', sort_by='title'),
+    }
+    for filters in cases.values():
+        assert legacy_ids(filters, today) == repository_ids(filters, today)
+    assert legacy_counts(today) == _bucket_counts(Task, today)
+
+    print(f"{'query':<28} {'Task.query':>12} {'repository':>12} {'speedup':>7}")
+    for name, filters in cases.items():
+        report(name, lambda: legacy_ids(filters, today), lambda: repository_ids(filters, today))
+    report('count buckets', lambda: legacy_counts(today), lambda: _bucket_counts(Task, today))
@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+# Concurrent reads during writes on one SQLite file, with one worker per
+# process as in a multi-worker deployment. Each profile runs against a fresh
+# database: 'default' keeps SQLite's rollback journal and deferred
+# transactions, 'sqlite' uses WAL and BEGIN IMMEDIATE at the first write.
+parser = argparse.ArgumentParser(description='SQLite concurrency benchmark')
+parser.add_argument('--readers', type=int, default=4, help='reader processes')
+parser.add_argument('--writers', type=int, default=2, help='writer processes')
+parser.add_argument('--seconds', type=float, default=5, help='duration of each run')
+parser.add_argument('--tasks', type=int, default=1000, help='rows in the task table')
+parser.add_argument('--profiles', nargs='*', default=['default', 'sqlite'], help='config profiles to compare')
+
+
+def _setup(profile, path):
+    os.environ['TASKMASTER_PROFILE'] = profile
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ['JOBS_ENABLED'] = '0'
+    from app import app, db
+    return app, db
+
+
+def _seed(profile, path, tasks):
+    from datetime import datetime, timedelta
+    app, db = _setup(profile, path)
+    from app.models import Task
+    with app.app_context():
+        now = datetime.now()
+        db.session.add_all(Task(title=f'Task {i}', description='benchmark', due_date=now + timedelta(days=i % 21 - 10),
+                                status='not-started') for i in range(tasks))
+        db.session.commit()
+
+
+def _worker(role, index, stride, profile, path, tasks, barrier, seconds, results):
+    from datetime import date
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm.exc import StaleDataError
+    app, db = _setup(profile, path)
+    from app.models import Task
+    from app.repository import TaskFilters, _bucket_counts, ids_statement
+
+    done, errors, latencies, elapsed = 0, 0, [], 0
+    # Each writer updates its own rows, so failures are lock errors, not version conflicts
+    rows = range(index + 1, tasks + 1, stride)
+    statuses = ('not-started', 'in-progress', 'completed')
+    filters = TaskFilters(filter_type='upcoming')
+    try:
+        with app.app_context():
+            # Start together once every process has imported the app; if one
+            # crashed before getting here the others time out instead of hanging
+            barrier.wait(timeout=120)
+            started = time.perf_counter()
+            while time.perf_counter() < started + seconds:
+                began = time.perf_counter()
+                try:
+                    if role == 'write':
+                        task = db.session.get(Task, rows[done % len(rows)])
+                        task.status = statuses[done % 3]
+                        db.session.commit()
+                    else:
+                        _bucket_counts(Task, date.today())
+                        list(db.session.scalars(ids_statement(filters), filters.params(date.today())))
+                        db.session.rollback()
+                    done += 1
+                    latencies.append(time.perf_counter() - began)
+                except (OperationalError, StaleDataError):
+                    db.session.rollback()
+                    errors += 1
+            elapsed = time.perf_counter() - started
+    finally:
+        # Always report, or the parent would wait forever for a crashed worker
+        results.put((role, done, errors, latencies, elapsed))
+
+
+def run(profile, args):
+    path = os.path.join(tempfile.mkdtemp(prefix='taskmaster-bench-'), 'bench.db')
+    ctx = multiprocessing.get_context('spawn')
+    seeder = ctx.Process(target=_seed, args=(profile, path, args.tasks))
+    seeder.start()
+    seeder.join()
+
+    results = ctx.Queue()
+    barrier = ctx.Barrier(args.readers + args.writers)
+    workers = [ctx.Process(target=_worker, args=(role, index, max(1, args.writers), profile, path, args.tasks, barrier, args.seconds, results))
+               for role, count in (('read', args.readers), ('write', args.writers)) for index in range(count)]
+    for worker in workers:
+        worker.start()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+
+    for role in ('read', 'write'):
+        rows = [row for row in collected if row[0] == role]
+        # Each worker's rate over the time it actually ran
+        throughput = sum(row[1] / row[4] for row in rows if row[4])
+        errors = sum(row[2] for row in rows)
+        latencies = sorted(latency for row in rows for latency in row[3])
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        print(f'{profile:<10} {role:<6} {throughput:10.1f}/s {errors:8d} {p50:9.2f} ms {p99:9.2f} ms')
+
+
+if __name__ == '__main__':
+    args = parser.parse_args()
+    print(f'{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile')
+    print(f"{'profile':<10} {'role':<6} {'throughput':>12} {'locked':>8} {'p50':>12} {'p99':>12}")
+    for profile in args.profiles:
+        run(profile, args)
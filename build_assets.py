@@ -0,0 +1,19 @@
+import importlib.util
+import os
+
+# Build fingerprinted, minified and precompressed static assets
+root = os.path.dirname(os.path.abspath(__file__))
+static_folder = os.path.join(root, 'app', 'static')
+
+# Load app/assets.py by path: importing it through the app package would boot
+# the application and create tables in the configured database
+spec = importlib.util.spec_from_file_location('taskmaster_assets', os.path.join(root, 'app', 'assets.py'))
+assets = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(assets)
+
+print('Building static assets...')
+manifest = assets.build_assets(static_folder)
+for filename, hashed in sorted(manifest.items()):
+    print(f'  {filename} -> {hashed}')
+
+print(f'Built {len(manifest)} assets. Restart the app to serve them.')
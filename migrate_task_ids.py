@@ -0,0 +1,38 @@
+import os
+
+# The check refuses exactly the schema this script repairs
+os.environ['SCHEMA_CHECK'] = '0'
+
+from sqlalchemy import func, select
+
+from app import app, db
+from app.models import Task, ArchivedTask, TaskEvent
+from app.sqlite import reuses_ids
+
+# Rebuild a SQLite task table created without AUTOINCREMENT so task ids are
+# never handed out twice. The id sequence starts above every id ever used by
+# a live task, an archived one or the history, including ids already reused.
+with app.app_context():
+    engine = db.engine
+    if engine.dialect.name != 'sqlite' or not reuses_ids(engine, 'task'):
+        print('Nothing to do: the task table already keeps its ids.')
+        raise SystemExit(0)
+
+    with engine.begin() as conn:
+        old_columns = [row[1] for row in conn.exec_driver_sql('PRAGMA table_info(task)')]
+        columns = ', '.join(name for name in old_columns if name in Task.__table__.c)
+        conn.exec_driver_sql('ALTER TABLE task RENAME TO task_old')
+        # Indexes moved with the renamed table and would clash with the new ones
+        for index in Task.__table__.indexes:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS {index.name}')
+        Task.__table__.create(conn)
+        conn.exec_driver_sql(f'INSERT INTO task ({columns}) SELECT {columns} FROM task_old')
+        conn.exec_driver_sql('DROP TABLE task_old')
+
+        highest = max(conn.execute(select(func.max(Task.id))).scalar() or 0,
+                      conn.execute(select(func.max(ArchivedTask.id))).scalar() or 0,
+                      conn.execute(select(func.max(TaskEvent.task_id))).scalar() or 0)
+        conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'task'")
+        conn.exec_driver_sql("INSERT INTO sqlite_sequence (name, seq) VALUES ('task', ?)", (highest,))
+
+    print(f'Rebuilt the task table; new task ids start after {highest}.')
@@ -0,0 +1,78 @@
+import os
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# The app is configured from the environment when it is first imported, so
+# point it at a primary and a replica SQLite file before importing it
+_data_dir = tempfile.mkdtemp(prefix='taskmaster-tests-')
+os.environ.update({
+    'TASKMASTER_PROFILE': 'default',
+    'DATABASE_URL': f'sqlite:///{_data_dir}/primary.db',
+    'DATABASE_REPLICA_URLS': f'sqlite:///{_data_dir}/replica.db',
+    'JOBS_ENABLED': '0',
+    'RATELIMIT_ROUTES': 'search=3/minute',
+})
+
+from app import app as flask_app, db  # noqa: E402
+from app.cache import task_cache  # noqa: E402
+from app.models import Task, User  # noqa: E402
+from app.ratelimit import db_latency  # noqa: E402
+from app.tokens import rejected_tokens, token_cache  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with flask_app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            db.metadata.drop_all(engine)
+            db.metadata.create_all(engine)
+    task_cache.clear()
+    token_cache.clear()
+    rejected_tokens.clear()
+    flask_app.extensions['ratelimit'].backend.clear()
+    db_latency.average = None
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def user(app):
+    """A user that exists on the primary and the replica alike"""
+    with app.app_context():
+        for engine in db.engines.values():
+            with engine.begin() as connection:
+                user = User(username='demo')
+                user.set_password('secret')
+                connection.execute(User.__table__.insert(),
+                                   {'id': 1, 'username': user.username, 'password_hash': user.password_hash})
+    return 1
+
+
+@pytest.fixture
+def client(app, user):
+    client = app.test_client()
+    client.post('/login', data={'username': 'demo', 'password': 'secret'})
+    return client
+
+
+@pytest.fixture
+def session(app):
+    with app.app_context():
+        yield db.session
+
+
+@pytest.fixture
+def add_task(app):
+    """Commit a task to the primary from a context of its own; returns its id"""
+    def add_task(title='task', due_date=datetime(2030, 1, 10), status='not-started', **columns):
+        with app.app_context():
+            task = Task(title=title, due_date=due_date, status=status, **columns)
+            db.session.add(task)
+            db.session.commit()
+            return task.id
+    return add_task
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.jobs import archive_completed_tasks
+from app.models import ArchivedTask, Task
+
+LONG_AGO = datetime.utcnow() - timedelta(days=60)
+
+
+@pytest.fixture
+def archived(app, add_task):
+    """Ids of a task the archive job moved, and of two it left alone"""
+    old = add_task('old', status='completed', last_updated_on=LONG_AGO)
+    recent = add_task('recent', status='completed')
+    open_task = add_task('open', last_updated_on=LONG_AGO)
+    with app.app_context():
+        assert archive_completed_tasks(days=30, batch_size=1) == {'archived': 1}
+    return old, recent, open_task
+
+
+@pytest.fixture
+def primary_client(client):
+    # The tasks only exist on the primary, so keep the reads there
+    with client.session_transaction() as session:
+        session['_primary_until'] = 2 ** 40
+    return client
+
+
+def test_only_old_completed_tasks_are_archived(session, archived):
+    old, recent, open_task = archived
+
+    assert session.get(Task, old) is None
+    assert session.get(ArchivedTask, old).title == 'old'
+    assert session.get(ArchivedTask, old).archived_on is not None
+    assert {session.get(Task, task_id).title for task_id in (recent, open_task)} == {'recent', 'open'}
+
+
+def test_lists_leave_archived_tasks_out_by_default(primary_client, archived):
+    items = primary_client.get('/api/tasks').get_json()['items']
+
+    assert sorted(item['title'] for item in items) == ['open', 'recent']
+    assert not any(item['archived'] for item in items)
+
+
+def test_lists_include_archived_tasks_when_asked(primary_client, archived):
+    old = archived[0]
+
+    items = primary_client.get('/api/tasks?include_archived=1').get_json()['items']
+
+    assert sorted(item['title'] for item in items) == ['old', 'open', 'recent']
+    assert [item['id'] for item in items if item['archived']] == [old]
+
+
+def test_archived_tasks_are_found_only_when_asked(primary_client, archived):
+    old = archived[0]
+
+    assert primary_client.get(f'/api/tasks/{old}').status_code == 404
+    response = primary_client.get(f'/api/tasks/{old}?include_archived=1')
+    assert response.status_code == 200
+    assert response.get_json()['title'] == 'old'
+    assert 'archived_on' in response.get_json()
+
+
+def test_archiving_invalidates_cached_lists(app, primary_client, add_task):
+    add_task('old', status='completed', last_updated_on=LONG_AGO)
+    assert primary_client.get('/api/tasks').get_json()['total'] == 1
+
+    with app.app_context():
+        archive_completed_tasks(days=30)
+
+    assert primary_client.get('/api/tasks').get_json()['total'] == 0
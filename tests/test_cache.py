@@ -0,0 +1,82 @@
+from datetime import date, datetime
+
+from sqlalchemy import insert
+
+from app import db
+from app.cache import bump_generation, current_generation, task_cache
+from app.models import Task
+from app.repository import TaskFilters, count_buckets, list_task_ids
+
+TODAY = date(2030, 1, 1)
+
+
+def _ids():
+    return list(list_task_ids(TaskFilters(), TODAY))
+
+
+def _hits():
+    return task_cache.stats()['hits']
+
+
+def _write_from_another_process(title):
+    # A plain engine connection bypasses the session hooks, like a write made
+    # by another web worker or the job worker
+    with db.engine.begin() as connection:
+        connection.execute(insert(Task.__table__).values(title=title, due_date=datetime(2030, 1, 10),
+                                                         status='not-started', version=1))
+        bump_generation(connection)
+
+
+def test_lists_are_cached_until_a_task_write_commits(session, add_task):
+    add_task('first')
+    assert len(_ids()) == 1
+    hits = _hits()
+
+    assert len(_ids()) == 1
+    assert _hits() == hits + 1
+
+    add_task('second')
+    assert len(_ids()) == 2
+
+
+def test_rolled_back_writes_keep_the_cache(session, add_task):
+    add_task('first')
+    _ids()
+    generation = current_generation()
+
+    session.add(Task(title='never', due_date=datetime(2030, 1, 10)))
+    session.flush()
+    session.rollback()
+
+    hits = _hits()
+    assert current_generation() == generation
+    assert len(_ids()) == 1
+    assert _hits() == hits + 1
+
+
+def test_writes_of_other_processes_invalidate_lists_and_counts(session, add_task):
+    add_task('first')
+    assert len(_ids()) == 1
+    assert count_buckets(TODAY)['all'] == 1
+
+    _write_from_another_process('elsewhere')
+
+    assert len(_ids()) == 2
+    assert count_buckets(TODAY)['all'] == 2
+
+
+def test_the_generation_is_read_once_per_request(app, session):
+    with app.test_request_context('/'):
+        generation = current_generation()
+        _write_from_another_process('elsewhere')
+        assert current_generation() == generation
+
+    assert current_generation() == generation + 1
+
+
+def test_a_request_sees_its_own_writes(app, session):
+    with app.test_request_context('/'):
+        assert _ids() == []
+        session.add(Task(title='mine', due_date=datetime(2030, 1, 10)))
+        session.commit()
+        assert len(_ids()) == 1
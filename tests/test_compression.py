@@ -0,0 +1,93 @@
+import gzip
+
+import pytest
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from app.compression import CompressionMiddleware, _Gzip, negotiate
+
+ENCODINGS = [('br', 'brotli'), ('zstd', 'zstandard'), ('gzip', 'gzip')]
+BODY = b'{"items": []}' * 100
+
+
+@pytest.mark.parametrize('accept, expected', [
+    ('gzip', 'gzip'),
+    ('gzip, br', 'br'),
+    ('br;q=0.5, gzip', 'gzip'),
+    ('*', 'br'),
+    ('*;q=0.1, gzip;q=0', 'br'),
+    ('GZIP;q=0.8', 'gzip'),
+    ('gzip;q=0, br;q=0', None),
+    ('identity', None),
+    ('gzip;q=nonsense', None),
+    ('', None),
+])
+def test_negotiate(accept, expected):
+    chosen = negotiate(accept, ENCODINGS)
+    assert (chosen[0] if chosen else None) == expected
+
+
+def _client(body=BODY, mimetype='application/json', **headers):
+    def app(environ, start_response):
+        response = Response(body, mimetype=mimetype, headers=headers)
+        return response(environ, start_response)
+
+    middleware = CompressionMiddleware(app, min_size=500)
+    middleware.encodings = [('gzip', _Gzip)]
+    return Client(middleware)
+
+
+def test_bodies_are_compressed_for_clients_that_accept_it():
+    response = _client(ETag='"7"').get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert response.headers['ETag'] == 'W/"7"'
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert gzip.decompress(response.data) == BODY
+
+
+def test_clients_without_accept_encoding_get_the_plain_body():
+    response = _client().get('/')
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.data == BODY
+
+
+@pytest.mark.parametrize('client', [
+    _client(body=b'{}'),
+    _client(mimetype='image/png'),
+    _client(**{'Content-Encoding': 'br'}),
+    _client(**{'Cache-Control': 'no-transform'}),
+], ids=['small', 'incompressible', 'encoded', 'no-transform'])
+def test_some_responses_are_passed_through(client):
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers.get('Content-Encoding') in (None, 'br')
+    assert 'Vary' not in response.headers
+
+
+def test_streamed_responses_are_compressed_chunk_by_chunk():
+    def app(environ, start_response):
+        return Response((chunk for chunk in (b'a' * 1000, b'b' * 1000)), mimetype='text/csv')(environ, start_response)
+
+    middleware = CompressionMiddleware(app)
+    middleware.encodings = [('gzip', _Gzip)]
+    response = Client(middleware).get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    assert gzip.decompress(response.data) == b'a' * 1000 + b'b' * 1000
+
+
+def test_the_app_compresses_large_json_responses(client, add_task):
+    for i in range(20):
+        add_task(f'task {i}', description='x' * 50)
+    # the tasks only exist on the primary, so keep the list read there
+    with client.session_transaction() as session:
+        session['_primary_until'] = 2 ** 40
+
+    response = client.get('/api/tasks', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert len(gzip.decompress(response.data)) > len(response.data)
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from app.history import compact_history, dumps, task_history
+from app.models import Task, TaskEvent
+
+
+def test_creates_and_updates_are_recorded(client, add_task):
+    task_id = add_task('report')
+
+    client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress'})
+    client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress'})
+    events = client.get(f'/api/tasks/{task_id}/history').get_json()
+
+    assert [event['kind'] for event in events] == ['create', 'update']
+    assert events[0]['changes']['title'] == 'report'
+    assert events[0]['changes']['due_date'] == '2030-01-10T00:00:00'
+    assert events[1]['changes'] == {'status': 'in-progress'}
+    assert events[1]['user_id'] == 1
+
+
+def test_a_delete_is_recorded_for_the_deleting_user(client, add_task):
+    task_id = add_task()
+
+    client.post(f'/tasks/{task_id}/delete')
+    events = client.get(f'/api/tasks/{task_id}/history').get_json()
+
+    assert events[-1]['kind'] == 'delete'
+    assert events[-1]['user_id'] == 1
+    assert events[-1]['changes'] == {}
+
+
+def test_tasks_without_history_are_not_found(client):
+    assert client.get('/api/tasks/12345/history').status_code == 404
+
+
+def test_long_histories_are_folded_into_a_snapshot(session, add_task):
+    task_id = add_task('draft', status='not-started')
+    for number in range(1, 6):
+        task = session.get(Task, task_id)
+        task.title = f'draft {number}'
+        task.status = 'in-progress' if number == 2 else task.status
+        session.commit()
+
+    result = compact_history(max_events=3)
+    events = task_history(task_id)
+
+    assert result['compacted'] == 1
+    assert [event.kind for event in events] == ['snapshot', 'update', 'update']
+    snapshot = events[0].to_dict()['changes']
+    assert snapshot['title'] == 'draft 3'
+    assert snapshot['status'] == 'in-progress'
+    assert [event.to_dict()['changes'] for event in events[1:]] == [{'title': 'draft 4'}, {'title': 'draft 5'}]
+
+
+def test_short_histories_are_left_alone(session, add_task):
+    task_id = add_task()
+
+    assert compact_history(max_events=3)['compacted'] == 0
+    assert [event.kind for event in task_history(task_id)] == ['create']
+
+
+def test_histories_of_long_deleted_tasks_are_pruned(session):
+    long_ago = datetime.utcnow() - timedelta(days=100)
+    session.add_all([
+        TaskEvent(task_id=1, ts=long_ago, kind='create', changes=dumps({'title': 'old'})),
+        TaskEvent(task_id=1, ts=long_ago, kind='delete'),
+        TaskEvent(task_id=2, ts=long_ago, kind='create', changes=dumps({'title': 'kept'})),
+        TaskEvent(task_id=3, ts=datetime.utcnow(), kind='delete'),
+    ])
+    session.commit()
+
+    assert compact_history(retention_days=90)['pruned'] == 2
+    assert task_history(1) == []
+    assert len(task_history(2)) == 1
+    assert len(task_history(3)) == 1
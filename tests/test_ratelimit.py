@@ -0,0 +1,83 @@
+import pytest
+
+from app.ratelimit import Limit, MemoryBackend, RateLimiter, db_latency, parse_limit
+
+
+def test_api_errors_are_json(client):
+    response = client.get('/api/tasks/12345')
+
+    assert response.status_code == 404
+    assert response.mimetype == 'application/json'
+    assert response.get_json()['success'] is False
+
+
+def test_html_errors_stay_html(client):
+    response = client.get('/tasks/12345/edit')
+
+    assert response.status_code == 404
+    assert response.mimetype == 'text/html'
+
+
+def test_a_rate_limited_search_answers_json_with_retry_after(client):
+    for _ in range(3):
+        assert client.get('/api/tasks?search=report').status_code == 200
+
+    response = client.get('/api/tasks?search=report')
+
+    assert response.status_code == 429
+    assert response.get_json()['success'] is False
+    assert int(response.headers['Retry-After']) > 0
+
+
+def test_only_the_first_page_of_a_search_spends_the_search_budget(client):
+    assert client.get('/api/tasks?search=report').status_code == 200
+    for offset in range(100, 1100, 100):
+        assert client.get(f'/api/tasks?search=report&offset={offset}').status_code == 200
+
+    assert client.get('/api/tasks?search=other').status_code == 200
+
+
+def test_responses_carry_the_remaining_budget(client):
+    response = client.get('/api/tasks?search=report')
+
+    assert response.headers['X-RateLimit-Limit'] == '3'
+    assert response.headers['X-RateLimit-Remaining'] == '2'
+
+
+def test_expensive_requests_are_shed_while_the_database_is_slow(client, monkeypatch):
+    monkeypatch.setattr(db_latency, 'current', lambda: 1.0)
+
+    shed = client.get('/api/tasks?search=report')
+    cheap = client.get('/api/tasks')
+
+    assert shed.status_code == 503
+    assert shed.headers['Retry-After'] == '5'
+    assert cheap.status_code == 200
+
+
+def test_shed_requests_spend_no_tokens(client, monkeypatch):
+    with monkeypatch.context() as patch:
+        patch.setattr(db_latency, 'current', lambda: 1.0)
+        for _ in range(5):
+            client.get('/api/tasks?search=report')
+
+    assert client.get('/api/tasks?search=report').headers['X-RateLimit-Remaining'] == '2'
+
+
+def test_buckets_refill_at_the_limit_rate():
+    limiter = RateLimiter(MemoryBackend(), parse_limit('2/minute'))
+
+    assert limiter.hit('user:1', 'main.tasks', now=0)[0]
+    assert limiter.hit('user:1', 'main.tasks', now=0)[0]
+    allowed, limit, tokens, retry_after = limiter.hit('user:1', 'main.tasks', now=0)
+    assert not allowed
+    assert retry_after == 30
+    assert limiter.hit('user:1', 'main.tasks', now=30)[0]
+    assert limiter.hit('user:2', 'main.tasks', now=30)[0]
+
+
+def test_parse_limit():
+    assert parse_limit('30/minute') == Limit(30, 60)
+    assert parse_limit('5/10s') == Limit(5, 10.0)
+    with pytest.raises(ValueError):
+        parse_limit('5/fortnight')
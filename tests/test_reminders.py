@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from app.models import Task
+from app.reminders import ReminderEngine
+
+# Overdue from 2030-01-11 00:00, so reminders at 01-10 00:00 and 01-10 23:00
+DUE = datetime(2030, 1, 10)
+
+
+class ListSink:
+    def __init__(self, fail=()):
+        self.sent = []
+        self.fail = set(fail)
+
+    def send(self, reminder):
+        if reminder['task_id'] in self.fail:
+            raise OSError('unreachable')
+        self.sent.append(reminder)
+
+
+def _kinds(reminders):
+    return [(reminder['task_id'], reminder['kind'], reminder['minutes_before']) for reminder in reminders]
+
+
+def test_tick_returns_each_reminder_once_when_due(session, add_task):
+    task = session.get(Task, add_task(due_date=DUE))
+    engine = ReminderEngine()
+    assert engine.tick(session, Task, now=DUE - timedelta(hours=12)) == []
+
+    assert _kinds(engine.tick(session, Task, now=DUE)) == [(task.id, 'reminder', 1440)]
+    assert engine.tick(session, Task, now=DUE + timedelta(minutes=1)) == []
+    assert _kinds(engine.tick(session, Task, now=DUE + timedelta(days=1))) == [
+        (task.id, 'reminder', 60), (task.id, 'overdue', 0)]
+    assert engine.pending == 0
+
+
+def test_tick_does_not_replay_events_from_before_the_first_tick(session, add_task):
+    add_task(due_date=DUE)
+    engine = ReminderEngine()
+
+    assert engine.tick(session, Task, now=DUE + timedelta(hours=12)) == []
+    assert [reminder['kind'] for reminder in engine.tick(session, Task, now=DUE + timedelta(days=1))] == [
+        'reminder', 'overdue']
+
+
+def test_tick_loads_tasks_as_the_horizon_moves(session, add_task):
+    later = session.get(Task, add_task(due_date=DUE + timedelta(days=10)))
+    engine = ReminderEngine(horizon=timedelta(hours=48))
+    engine.tick(session, Task, now=DUE)
+    assert engine.pending == 0
+
+    engine.tick(session, Task, now=later.due_date - timedelta(hours=12))
+
+    assert engine.pending == 3
+
+
+def test_completed_tasks_get_no_reminders(session, add_task):
+    task = session.get(Task, add_task(due_date=DUE))
+    engine = ReminderEngine()
+    engine.tick(session, Task, now=DUE - timedelta(hours=12))
+
+    task.status = 'completed'
+    session.commit()
+
+    assert engine.tick(session, Task, now=DUE + timedelta(days=1)) == []
+
+
+def test_rescheduled_tasks_fire_for_the_new_due_date_only(session, add_task):
+    task = session.get(Task, add_task(due_date=DUE))
+    engine = ReminderEngine()
+    engine.tick(session, Task, now=DUE - timedelta(hours=12))
+
+    task.due_date = DUE + timedelta(days=1)
+    session.commit()
+
+    # The old date's hour-before and overdue events are gone
+    reminders = engine.tick(session, Task, now=DUE + timedelta(days=1))
+    assert _kinds(reminders) == [(task.id, 'reminder', 1440)]
+    reminders += engine.tick(session, Task, now=DUE + timedelta(days=2))
+    assert _kinds(reminders) == [(task.id, 'reminder', 1440), (task.id, 'reminder', 60), (task.id, 'overdue', 0)]
+    assert {reminder['due_date'] for reminder in reminders} == {'2030-01-11'}
+
+
+def test_deliver_skips_reminders_the_sink_rejects(session, add_task):
+    ok = session.get(Task, add_task('ok', due_date=DUE))
+    broken = session.get(Task, add_task('broken', due_date=DUE))
+    sink = ListSink(fail={broken.id})
+    engine = ReminderEngine(sink=sink)
+    engine.tick(session, Task, now=DUE - timedelta(hours=12))
+
+    result = engine.deliver(engine.tick(session, Task, now=DUE))
+
+    assert result == {'sent': 1, 'failed': 1}
+    assert [reminder['task_id'] for reminder in sink.sent] == [ok.id]
+    assert engine.fired == 1
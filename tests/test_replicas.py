@@ -0,0 +1,44 @@
+def test_read_only_views_read_from_the_replica(client, add_task):
+    # Tasks land on the primary only: the replica never catches up in these tests
+    task_id = add_task('on the primary')
+
+    assert client.get(f'/api/tasks/{task_id}').status_code == 404
+    assert client.get('/api/tasks').get_json()['total'] == 0
+
+
+def test_writes_always_go_to_the_primary(client, add_task):
+    task_id = add_task('on the primary')
+
+    response = client.post(f'/api/tasks/{task_id}/status', json={'status': 'completed'})
+
+    assert response.status_code == 200
+    assert response.get_json()['task']['status'] == 'completed'
+
+
+def test_reads_stick_to_the_primary_after_a_write(client, add_task):
+    task_id = add_task('on the primary')
+    client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress'})
+
+    response = client.get(f'/api/tasks/{task_id}')
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'in-progress'
+
+
+def test_reads_return_to_the_replica_once_the_sticky_window_passes(client, add_task):
+    task_id = add_task('on the primary')
+    client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress'})
+    with client.session_transaction() as session:
+        session['_primary_until'] = 0
+
+    assert client.get(f'/api/tasks/{task_id}').status_code == 404
+
+
+def test_other_users_are_not_sticky(app, client, add_task):
+    task_id = add_task('on the primary')
+    client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress'})
+
+    other = app.test_client()
+    other.post('/login', data={'username': 'demo', 'password': 'secret'})
+
+    assert other.get(f'/api/tasks/{task_id}').status_code == 404
@@ -0,0 +1,159 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, select
+
+from app import db
+
+from app.jobs import archive_completed_tasks
+from app.models import SavedView, SavedViewTask, Task
+from app.repository import TaskFilters
+from app.saved_views import dump_filters, refresh_view
+
+VIEWS = {
+    'all': TaskFilters(),
+    'overdue': TaskFilters(filter_type='overdue'),
+    'today in progress': TaskFilters(filter_type='today', status='in-progress'),
+    'upcoming': TaskFilters(filter_type='upcoming'),
+    # LIKE wildcards must match the way the list query matches them
+    'a_b': TaskFilters(search='a_b'),
+    'deploy': TaskFilters(search='Deploy'),
+}
+
+
+def _day(days):
+    return datetime.combine(datetime.now().date() + timedelta(days=days), datetime.min.time())
+
+
+def _create_views(session, user):
+    today = datetime.now().date()
+    views = []
+    for name, filters in VIEWS.items():
+        view = SavedView(user_id=user, name=name, filters=dump_filters(filters))
+        session.add(view)
+        session.flush()
+        refresh_view(session, view, today)
+        views.append(view)
+    session.commit()
+    return views
+
+
+def _membership(session, view):
+    members = set(session.scalars(select(SavedViewTask.task_id).where(SavedViewTask.view_id == view.id)))
+    session.refresh(view)
+    return members, view.match_count
+
+
+def _assert_matches_refresh(session, views):
+    today = datetime.now().date()
+    for view in views:
+        incremental = _membership(session, view)
+        refresh_view(session, view, today)
+        session.commit()
+        assert incremental == _membership(session, view), view.name
+        assert incremental[1] == len(incremental[0]), view.name
+
+
+def test_new_tasks_join_matching_views(session, user, add_task):
+    views = _create_views(session, user)
+
+    add_task('a_b release', _day(-1))
+    add_task('axb release', _day(0), status='in-progress')
+    add_task('A_B notes', _day(3), description='deploy checklist')
+
+    _assert_matches_refresh(session, views)
+    assert {view.name: view.match_count for view in views} == {
+        'all': 3, 'overdue': 1, 'today in progress': 1, 'upcoming': 2, 'a_b': 3, 'deploy': 1}
+
+
+def test_edited_tasks_move_between_views(session, user, add_task):
+    first = session.get(Task, add_task('plain', _day(-2)))
+    second = session.get(Task, add_task('a_b', _day(0), status='in-progress'))
+    third = session.get(Task, add_task('deploy', _day(5)))
+    views = _create_views(session, user)
+
+    first.title = 'a_b follow-up'
+    first.due_date += timedelta(days=3)
+    second.status = 'completed'
+    third.description = 'DEPLOY to staging'
+    third.title = 'axb'
+    session.commit()
+
+    _assert_matches_refresh(session, views)
+
+
+def test_deleted_tasks_leave_every_view(session, user, add_task):
+    kept = session.get(Task, add_task('a_b kept', _day(-1)))
+    gone = session.get(Task, add_task('a_b gone', _day(-1)))
+    views = _create_views(session, user)
+
+    session.delete(gone)
+    session.commit()
+
+    _assert_matches_refresh(session, views)
+    assert session.scalars(select(SavedViewTask.task_id).distinct()).all() == [kept.id]
+
+
+def test_rolled_back_writes_leave_views_alone(session, user, add_task):
+    task = session.get(Task, add_task('a_b', _day(-1)))
+    views = _create_views(session, user)
+    before = [_membership(session, view) for view in views]
+
+    task.title = 'something else'
+    session.add(Task(title='a_b new', due_date=task.due_date))
+    session.flush()
+    session.rollback()
+
+    assert [_membership(session, view) for view in views] == before
+
+
+def test_views_without_a_date_filter_stay_current_across_midnight(session, user, add_task):
+    views = _create_views(session, user)
+    # Midnight passed and the refresh job did not run
+    yesterday = datetime.now().date() - timedelta(days=1)
+    for view in views:
+        if view.refreshed_for is not None:
+            view.refreshed_for = yesterday
+    session.commit()
+
+    add_task('a_b release', _day(-1))
+
+    today = datetime.now().date()
+    current = {view.name: view.match_count for view in views if view.is_current(today)}
+    assert current == {'all': 1, 'a_b': 1, 'deploy': 0}
+    _assert_matches_refresh(session, [view for view in views if view.name in current])
+
+
+def test_archived_tasks_leave_every_view(session, user, add_task):
+    add_task('a_b done', _day(-1), status='completed')
+    kept = add_task('a_b open', _day(-1))
+    views = _create_views(session, user)
+
+    assert archive_completed_tasks(days=0) == {'archived': 1}
+
+    _assert_matches_refresh(session, views)
+    assert session.scalars(select(SavedViewTask.task_id).distinct()).all() == [kept]
+
+
+def test_a_task_write_costs_the_same_however_many_views_exist(app, session, user, add_task):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    _create_views(session, user)
+    add_task('first write', _day(-1))
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        add_task('a_b release', _day(-1))
+        few = len(statements)
+        for name, filters in VIEWS.items():
+            session.add(SavedView(user_id=user, name=f'{name} again', filters=dump_filters(filters)))
+            session.add(SavedView(user_id=user, name=f'{name} other',
+                                  filters=dump_filters(filters._replace(search='other'))))
+        session.commit()
+        statements.clear()
+        add_task('a_b release', _day(-1))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) == few
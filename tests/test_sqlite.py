@@ -0,0 +1,58 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.sqlite import configure_engine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/concurrency.db')
+    configure_engine(engine, journal_mode='WAL', busy_timeout_ms=100, immediate_writes=True)
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT)'))
+        conn.execute(text("INSERT INTO item (name) VALUES ('first')"))
+    yield engine
+    engine.dispose()
+
+
+def _write(engine, name):
+    with engine.begin() as conn:
+        conn.execute(text('INSERT INTO item (name) VALUES (:name)'), {'name': name})
+
+
+def test_reading_transactions_take_no_write_lock(engine):
+    with engine.connect() as reader:
+        reader.execute(text('SELECT count(*) FROM item')).scalar()
+        assert not reader.info.get('write_lock')
+
+        _write(engine, 'while reading')
+        reader.rollback()
+
+
+def test_the_first_write_takes_the_write_lock_until_commit(engine):
+    other = create_engine(engine.url, connect_args={'timeout': 0.1})
+    with engine.connect() as writer:
+        writer.execute(text('SELECT count(*) FROM item')).scalar()
+        writer.execute(text("INSERT INTO item (name) VALUES ('mine')"))
+        assert writer.info.get('write_lock')
+        with pytest.raises(OperationalError, match='locked'):
+            with other.begin() as conn:
+                conn.execute(text("INSERT INTO item (name) VALUES ('blocked')"))
+        writer.commit()
+        assert not writer.info.get('write_lock')
+
+    _write(other, 'after commit')
+    other.dispose()
+
+
+def test_a_transaction_can_write_after_another_process_wrote_since_it_read(engine):
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT count(*) FROM item')).scalar() == 1
+        _write(engine, 'elsewhere')
+        # Upgrading the deferred transaction in place would fail on the stale snapshot
+        conn.execute(text("INSERT INTO item (name) VALUES ('mine')"))
+        conn.commit()
+
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT count(*) FROM item')).scalar() == 3
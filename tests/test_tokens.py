@@ -0,0 +1,82 @@
+import pytest
+
+from app import db
+from app.models import ApiToken, User
+from app.tokens import TOKEN_PREFIX, issue_token, rejected_tokens, revoke_token, token_cache
+
+
+@pytest.fixture
+def token(app, user):
+    with app.app_context():
+        token, _ = issue_token(db.session, db.session.get(User, user), 'ci')
+        db.session.commit()
+    return token
+
+
+def _get(client, token, path='/api/v1/tasks'):
+    return client.get(path, headers={'Authorization': f'Bearer {token}'})
+
+
+def test_a_valid_token_reads_the_api_without_a_session(app, token):
+    response = _get(app.test_client(), token)
+
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 0
+    assert 'Set-Cookie' not in response.headers
+
+
+def test_token_requests_ignore_the_browser_session(client, token):
+    assert client.get('/api/tasks').status_code == 200
+
+    # The cookie of the logged in user is not even decoded
+    response = _get(client, token, '/api/tasks')
+
+    assert response.status_code == 302
+    assert 'Set-Cookie' not in response.headers
+
+
+def test_tokens_only_grant_the_api(app, token):
+    response = _get(app.test_client(), token, '/api/tasks')
+
+    assert response.status_code == 302
+    assert '/login' in response.headers['Location']
+
+
+def test_revoked_tokens_are_refused(app, token):
+    client = app.test_client()
+    assert _get(client, token).status_code == 200
+
+    with app.app_context():
+        revoke_token(db.session, ApiToken.query.one())
+        db.session.commit()
+
+    assert _get(client, token).status_code == 401
+
+
+def test_unknown_tokens_are_looked_up_once(app, user):
+    client = app.test_client()
+    bad = TOKEN_PREFIX + 'unknown'
+
+    assert _get(client, bad).status_code == 401
+    hits = rejected_tokens.stats()['hits']
+    assert _get(client, bad).status_code == 401
+    assert rejected_tokens.stats()['hits'] == hits + 1
+
+
+def test_tokens_that_were_never_issued_skip_the_lookup(app):
+    misses = rejected_tokens.stats()['misses']
+
+    assert _get(app.test_client(), 'not-a-token').status_code == 401
+    assert rejected_tokens.stats()['misses'] == misses
+
+
+def test_bad_tokens_do_not_evict_valid_ones(app, token, monkeypatch):
+    client = app.test_client()
+    monkeypatch.setattr(rejected_tokens, 'max_entries', 5)
+    assert _get(client, token).status_code == 200
+
+    for i in range(20):
+        _get(client, f'{TOKEN_PREFIX}bad{i}')
+
+    assert rejected_tokens.stats()['entries'] == 5
+    assert token_cache.stats()['entries'] == 1
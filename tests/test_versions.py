@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app import db
+from app.schema import check_columns
+
+
+def test_status_updates_bump_the_version_and_etag(client, add_task):
+    task_id = add_task()
+
+    response = client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress', 'version': 1})
+
+    assert response.status_code == 200
+    assert response.get_json()['task']['version'] == 2
+    assert response.headers['ETag'] == '"2"'
+
+
+def test_a_stale_body_version_is_a_conflict(client, add_task):
+    task_id = add_task()
+    client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress'})
+
+    response = client.post(f'/api/tasks/{task_id}/status', json={'status': 'completed', 'version': 1})
+
+    assert response.status_code == 409
+    assert response.get_json()['task']['status'] == 'in-progress'
+
+
+def test_a_stale_if_match_fails_the_precondition(client, add_task):
+    task_id = add_task()
+    client.post(f'/api/tasks/{task_id}/status', json={'status': 'in-progress'})
+
+    response = client.post(f'/api/tasks/{task_id}/status', json={'status': 'completed'}, headers={'If-Match': '"1"'})
+
+    assert response.status_code == 412
+    assert response.headers['ETag'] == '"2"'
+
+
+def test_a_current_if_match_is_accepted(client, add_task):
+    task_id = add_task()
+
+    response = client.post(f'/api/tasks/{task_id}/status', json={'status': 'completed'}, headers={'If-Match': '"1"'})
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('version', ['one', [1], {'v': 1}])
+def test_a_version_that_is_not_an_integer_is_rejected(client, add_task, version):
+    task_id = add_task()
+
+    response = client.post(f'/api/tasks/{task_id}/status', json={'status': 'completed', 'version': version})
+
+    assert response.status_code == 400
+
+
+def test_startup_refuses_a_task_table_without_the_version_column(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/old.db')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE task (id INTEGER PRIMARY KEY AUTOINCREMENT, title VARCHAR(100) NOT NULL, '
+                          'description TEXT, due_date DATETIME NOT NULL, status VARCHAR(20), remarks TEXT, '
+                          'created_on DATETIME, last_updated_on DATETIME, created_by_id INTEGER, '
+                          'created_by_name VARCHAR(64), last_updated_by_id INTEGER, last_updated_by_name VARCHAR(64))'))
+    app = SimpleNamespace(config={'SCHEMA_CHECK': True})
+
+    with pytest.raises(RuntimeError, match='ALTER TABLE task ADD COLUMN version INTEGER DEFAULT .1. NOT NULL'):
+        check_columns(app, SimpleNamespace(engine=engine, metadata=db.metadata))
+    engine.dispose()
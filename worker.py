@@ -0,0 +1,30 @@
+import argparse
+from app import app
+from app.jobs import scheduler
+
+# Run the background maintenance jobs outside the web process
+parser = argparse.ArgumentParser(description='TaskMaster background job worker')
+parser.add_argument('jobs', nargs='*', help='jobs to run (default: all)')
+parser.add_argument('--once', action='store_true', help='run the jobs once and exit')
+args = parser.parse_args()
+
+# Jobs that warm the caches of a web process have nothing to do here
+for name in [name for name, job in scheduler.jobs.items() if job.in_process]:
+    del scheduler.jobs[name]
+
+unknown = [name for name in args.jobs if name not in scheduler.jobs]
+if unknown:
+    parser.error(f"unknown job(s): {', '.join(unknown)}; available: {', '.join(scheduler.jobs)}")
+
+if args.once:
+    for name in args.jobs or list(scheduler.jobs):
+        print(f'Running {name}...')
+        scheduler.run(name)
+        job = scheduler.jobs[name]
+        print(f'  failed: {job.last_error}' if job.last_error else '  done')
+else:
+    for name in list(scheduler.jobs):
+        if args.jobs and name not in args.jobs:
+            del scheduler.jobs[name]
+    print(f"Worker running jobs: {', '.join(scheduler.jobs)}")
+    scheduler.run_forever()